@@ -6,6 +6,10 @@ def main():
     parser = argparse.ArgumentParser(description="Crypto Algo Trading System")
     parser.add_argument('mode', choices=['dashboard', 'bot'], help="Mode to run")
     parser.add_argument('--exchange', default='binance', help="Exchange to use for bot (binance, paper)")
+    parser.add_argument('--feed', default='poll', choices=['poll', 'stream'], help="Bot price source: poll the ticker every interval or stream trades")
+    parser.add_argument('--metrics-port', type=int, help="Serve bot latency metrics on http://127.0.0.1:<port>/metrics")
+    parser.add_argument('--metrics-file', default='logs/metrics.json', help="Periodic JSON snapshot of bot latency metrics")
+    parser.add_argument('--strategies', help="JSON list of bot configs (symbol x params) to run together on one event loop")
     
     args = parser.parse_args()
     
@@ -15,12 +19,20 @@ def main():
         
     elif args.mode == 'bot':
         print(f"Starting Trading Bot on {args.exchange}...")
+        from src.live_trade.log import setup_logging
+        # JSON lines to logs/trading_bot.log, written off the tick path
+        setup_logging()
         from src.live_trade.bot import TradingBot
         from src.live_trade.execution import BinanceAdapter, PaperTradingAdapter
         from dotenv import load_dotenv
         
         load_dotenv()
         
+        from src.live_trade.metrics import METRICS
+        METRICS.start_snapshots(args.metrics_file)
+        if args.metrics_port:
+            METRICS.serve(args.metrics_port)
+        
         config = {
             'symbol': 'BTC/USDT',
             'quantity': 0.001,
@@ -38,9 +50,36 @@ def main():
                 print("Error: BINANCE_API_KEY not found in .env")
                 return
             adapter = BinanceAdapter(api_key, secret)
+            # Markets/precision from the on-disk cache when fresh, before the first order
+            try:
+                adapter.load_markets()
+            except Exception as e:
+                print(f"Warning: could not preload markets ({e}); ccxt will load them on first use")
+            
+        if args.strategies:
+            import asyncio
+            from src.live_trade.runner import StrategyRunner, load_configs
+            runner = StrategyRunner.from_configs(adapter, load_configs(args.strategies, config))
+            try:
+                asyncio.run(runner.run())
+            except KeyboardInterrupt:
+                print("Stopping Bot...")
+            return
             
-        bot = TradingBot(adapter, config)
-        bot.run()
+        from src.live_trade.journal import StateJournal
+        bot = TradingBot(adapter, config, journal=StateJournal.for_bot(config['symbol']))
+        if args.feed == 'stream':
+            import asyncio
+            from src.live_trade.feeds import CcxtTradeFeed
+            from src.live_trade.orders import OrderPipeline
+            bot.orders = OrderPipeline(adapter)
+            feed = CcxtTradeFeed(config['symbol'])
+            try:
+                asyncio.run(bot.run_async(feed))
+            except KeyboardInterrupt:
+                print("Stopping Bot...")
+        else:
+            bot.run()
 
 if __name__ == "__main__":
     main()
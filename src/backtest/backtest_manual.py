@@ -1,22 +1,24 @@
 import pandas as pd
 import numpy as np
 
-def backtest_manual_strategy(file_path):
+from src.data_loader.store import CandleStore
+from src.strategy.session_breakout import SessionBreakout, tod_ms
+
+DEFAULT_START = '2026-01-01'
+
+def backtest_manual_strategy(file_path, start=DEFAULT_START, end=None):
     print(f"Loading {file_path}...")
-    try:
-        df = pd.read_csv(file_path, sep='\t')
-    except:
-        df = pd.read_csv(file_path)
-        
-    # Process Datetime (Exness is UTC)
-    df['datetime'] = pd.to_datetime(df['<DATE>'] + ' ' + df['<TIME>'])
-    df.set_index('datetime', inplace=True)
+    # 5m bars from the candle store (Exness is UTC), only for days start..end
+    # (inclusive): the range is a slice of the memory-mapped store
+    store = CandleStore.open(file_path)
+    df = store.frame('5m', start, end)
+    _, offsets = store.day_offsets('5m', start, end)
     
     # Calculate Mid-Prices (Logic discovered: Client uses Bid + Spread*0.01/2)
     # For BTCUSD on Exness, spread is in 0.01 units.
-    df['high'] = df['<HIGH>'] + (df['<SPREAD>'] * 0.01 / 2)
-    df['low']  = df['<LOW>']  + (df['<SPREAD>'] * 0.01 / 2)
-    df['close'] = df['<CLOSE>'] + (df['<SPREAD>'] * 0.01 / 2)
+    df['high'] = df['high'] + (df['spread'] * 0.01 / 2)
+    df['low']  = df['low']  + (df['spread'] * 0.01 / 2)
+    df['close'] = df['close'] + (df['spread'] * 0.01 / 2)
     
     # Strategy Parameters
     # Adjusted to UTC (Client 02:45-03:55 Terminal Time is 00:45-01:55 UTC)
@@ -33,122 +35,60 @@ def backtest_manual_strategy(file_path):
     TSL_ACTIVATE_PERC = 0.0040 # 0.40%
     TSL_TRAIL_COORD   = 0.0020 # 0.20% locked profit level
     
+    # Same state machine as Backtester and the live bot, on this file's windows
+    strategy = SessionBreakout(
+        'v1', buffer_pct=BUFF_PERC, sl_pct=SL_PERC, tp_pct=TGT_PERC,
+        tsl_activate_pct=TSL_ACTIVATE_PERC, tsl_trail_pct=TSL_TRAIL_COORD,
+        range_start=tod_ms(RANGE_START_UTC), range_end=tod_ms(RANGE_END_UTC),
+        entry_limit=tod_ms(ENTRY_LIMIT_UTC), exit_time=tod_ms(EXIT_TIME_UTC),
+    )
+    RESULT_LABELS = {'StopLoss': "SL HIT", 'TSL HIT': "TSL HIT", 'Target': "TP HIT", 'TimeExit': "TIME EXIT"}
+    
+    ts = df.index.values.astype('int64') // 10**6
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    
     # Results
     daily_results = []
     
-    # Filter for Jan 2026
-    df = df[df.index >= '2026-01-01']
-    
     # Iterate by Date
-    unique_dates = sorted(list(set(df.index.date)))
+    day_rows = list(zip(offsets[:-1], offsets[1:]))
     
-    print(f"\nScanning {len(unique_dates)} days (Jan 2026)...")
+    print(f"\nScanning {len(day_rows)} days ({start or 'first day'} to {end or 'last day'})...")
     print(f"{'Date':<12} | {'Signal':<6} | {'Entry':<10} | {'Exit':<10} | {'Result':<10} | {'PnL':<8}")
     print("-" * 80)
     
-    for current_date in unique_dates:
-        # Filter Day Data
-        day_str = str(current_date)
-        day_data = df[df.index.date == current_date]
-        
-        if day_data.empty: continue
-        
-        # 1. Define Session Range 
-        session_mask = (day_data.index.time >= pd.Timestamp(RANGE_START_UTC).time()) & \
-                       (day_data.index.time <= pd.Timestamp(RANGE_END_UTC).time())
-        session_data = day_data[session_mask]
-        
-        if session_data.empty:
-            continue
-            
-        range_high = session_data['high'].max()
-        range_low  = session_data['low'].min()
-        
-        # 2. Define Triggers
-        buy_trigger = range_high * (1 + BUFF_PERC)
-        sell_trigger = range_low * (1 - BUFF_PERC)
-        
-        # 3. Scan for Entry (After Session Range)
-        trade_data = day_data[day_data.index.time > pd.Timestamp(RANGE_END_UTC).time()]
-        trade_data = trade_data[trade_data.index.time <= pd.Timestamp(EXIT_TIME_UTC).time()]
+    for lo, hi in day_rows:
+        # Day Data is a row slice of the store
+        day_str = str(pd.Timestamp(int(ts[lo]), unit='ms').date())
         
         position = None # 'BUY' or 'SELL'
         entry_price = 0.0
-        entry_time = None
         exit_price = 0.0
-        
         trade_pnl = 0.0
         result_type = "NO TRD"
         
-        for t_time, row in trade_data.iterrows():
-            if position is None:
-                # Check for Entry (Only before Entry Limit)
-                if t_time.time() > pd.Timestamp(ENTRY_LIMIT_UTC).time():
-                    continue
-
-                if row['high'] >= buy_trigger:
-                    position = 'BUY'
-                    entry_price = buy_trigger
-                    entry_time = t_time
-                    tp_price = entry_price * (1 + TGT_PERC)
-                    sl_price = entry_price * (1 - SL_PERC)
-                    tsl_active = False
-                    
-                elif row['low'] <= sell_trigger:
-                    position = 'SELL'
-                    entry_price = sell_trigger
-                    entry_time = t_time
-                    tp_price = entry_price * (1 - TGT_PERC)
-                    sl_price = entry_price * (1 + SL_PERC)
-                    tsl_active = False
-                    
+        for t, h, l, c in zip(ts[lo:hi].tolist(), high[lo:hi].tolist(), low[lo:hi].tolist(), close[lo:hi].tolist()):
+            decision = strategy.update(t, h, l, c)
+            if decision is None:
+                continue
+            if decision[0] == 'entry':
+                position = decision[1].upper()
+                entry_price = decision[2]
             else:
-                # Manage Trade
-                curr_h = row['high']
-                curr_l = row['low']
-                
-                if position == 'BUY':
-                    # Trail Logic
-                    if not tsl_active and curr_h >= entry_price * (1 + TSL_ACTIVATE_PERC):
-                        tsl_active = True
-                        sl_price = entry_price * (1 - TSL_TRAIL_COORD)
-                    
-                    # Check SL
-                    if curr_l <= sl_price:
-                        result_type = "TSL HIT" if tsl_active else "SL HIT"
-                        exit_price = sl_price
-                        trade_pnl = exit_price - entry_price
-                        break
-                    # Check TP
-                    if curr_h >= tp_price:
-                        result_type = "TP HIT"
-                        exit_price = tp_price
-                        trade_pnl = exit_price - entry_price
-                        break
-                        
-                elif position == 'SELL':
-                    # Trail Logic
-                    if not tsl_active and curr_l <= entry_price * (1 - TSL_ACTIVATE_PERC):
-                        tsl_active = True
-                        sl_price = entry_price * (1 + TSL_TRAIL_COORD)
-                            
-                    # Check SL
-                    if curr_h >= sl_price:
-                        result_type = "TSL HIT" if tsl_active else "SL HIT"
-                        exit_price = sl_price
-                        trade_pnl = entry_price - exit_price
-                        break
-                    # Check TP
-                    if curr_l <= tp_price:
-                        result_type = "TP HIT"
-                        exit_price = tp_price
-                        trade_pnl = entry_price - exit_price
-                        break
+                result_type = RESULT_LABELS[decision[1]]
+                exit_price = decision[2]
         
         # End of Day Check
-        if position is not None and result_type == "NO TRD":
-            exit_price = trade_data.iloc[-1]['close']
-            result_type = "TIME EXIT"
+        decision = strategy.end_of_day()
+        if decision is not None:
+            result_type = RESULT_LABELS[decision[1]]
+            exit_price = decision[2]
+        # No session bars: the day is not reported
+        if not strategy.ranged:
+            continue
+        if position is not None:
             trade_pnl = (exit_price - entry_price) if position == 'BUY' else (entry_price - exit_price)
                 
         daily_results.append({
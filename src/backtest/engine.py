@@ -1,201 +1,416 @@
 import pandas as pd
 import numpy as np
 import os
+import json
+import hashlib
 from datetime import time
 import pytz
 
+from src.data_loader.ingest import CACHE_DIR
+from src.data_loader.store import CandleStore
+from src.strategy.session_breakout import SessionBreakout, tod_ms
+
+# Strategy Parameters
+# Verified: Client 02:45-03:55 session is UTC-based
+RANGE_START_UTC = "02:45" 
+RANGE_END_UTC   = "03:55" 
+ENTRY_LIMIT_UTC = "12:30" # 6 PM IST
+EXIT_TIME_UTC   = "13:40" # 7:15 PM IST
+
+BUFF_PERC = 0.0005 # 0.05%
+
+# v1 parameters
+TGT_PERC  = 0.0070 # 0.70%
+SL_PERC   = 0.0030 # 0.30%
+TSL_ACTIVATE_PERC = 0.0040 # 0.40%
+TSL_TRAIL_COORD   = 0.0020 # 0.20% locked profit level
+
+# v2 parameters
+TGT_PTS_V2 = 700
+SL_PTS_V2 = 300
+TSL_ACTIVATE_PERC_V2 = 0.0040 # 0.40%
+TSL_TRAIL_PTS_V2 = 200
+
+# Everything above that changes trades (recorded with incremental results)
+STRATEGY_PARAMS = (
+    'RANGE_START_UTC', 'RANGE_END_UTC', 'ENTRY_LIMIT_UTC', 'EXIT_TIME_UTC', 'BUFF_PERC',
+    'TGT_PERC', 'SL_PERC', 'TSL_ACTIVATE_PERC', 'TSL_TRAIL_COORD',
+    'TGT_PTS_V2', 'SL_PTS_V2', 'TSL_ACTIVATE_PERC_V2', 'TSL_TRAIL_PTS_V2',
+)
+
+DAY_NS = 24 * 60 * 60 * 10**9
+
+def tod_ns(hhmm):
+    """
+    Converts an 'HH:MM' string into nanoseconds since midnight.
+    """
+    t = pd.Timestamp(hhmm).time()
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**9
+
+def day_bounds(ts):
+    """
+    Groups int64 ns timestamps by calendar day in one pass.
+    Returns (starts, ends, order): day i is rows starts[i]:ends[i] after applying
+    `order` (None when the rows are already grouped by day). Rows within a day
+    keep their file order.
+    """
+    day = ts // DAY_NS
+    order = None
+    if len(day) > 1 and (day[1:] < day[:-1]).any():
+        order = np.argsort(day, kind='stable')
+        day = day[order]
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]]) if len(day) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(day)].astype(np.int64)
+    return starts, ends, order
+
 class Backtester:
-    def __init__(self, data_path, exchange_name='Exness', fee_pct=0.0, spread_pct=0.0, strategy_version='v1'):
+    def __init__(self, data_path, exchange_name='Exness', fee_pct=0.0, spread_pct=0.0, strategy_version='v1', engine='loop', skip_days=None,
+                 start=None, end=None):
         self.data_path = data_path
         self.exchange_name = exchange_name
         self.fee_pct = fee_pct / 100 
         self.spread_pct = spread_pct / 100
         self.strategy_version = strategy_version
+        self.engine = engine # 'loop' (bar by bar) or 'vectorized' (NumPy, one pass per day)
+        # Dates to leave out, e.g. cleaner.incomplete_days(load_day_index(...))
+        self.skip_days = set(skip_days) if skip_days else set()
+        # Dates to simulate (inclusive, None = from the first / to the last
+        # day); only these days' bars are read
+        self.start = start
+        self.end = end
         self.trades = []
+        self._store_index = None
+        self._day_offsets = None
+        
+    def run(self, incremental=False):
+        df = self._load_data()
+        if df is None:
+            return
+        
+        # Incremental: days are independent (positions are force-closed at
+        # EXIT_TIME_UTC), so only days from the last run's final day onward
+        # need simulating when parameters and the earlier bars are unchanged.
+        day_from, keep_bytes = self._resume_point(df) if incremental else (None, None)
+        if day_from is None:
+            print(f"Running full backtest for {self.exchange_name} (Mid-Price Logic)...")
+        else:
+            print(f"Running incremental backtest for {self.exchange_name} from {pd.Timestamp(day_from * DAY_NS).date()}...")
         
-    def run(self):
+        if self.engine == 'vectorized':
+            self._run_vectorized(df, day_from)
+        else:
+            self._run_loop(df, day_from)
+
+        if self._summarize(keep_bytes):
+            self._write_run_meta(df)
+
+    def simulate(self):
+        """
+        Runs the configured engine over every day and returns the trades as a
+        DataFrame, without printing a summary or writing results.
+        """
+        df = self._load_data()
+        self.trades = []
+        if df is not None:
+            if self.engine == 'vectorized':
+                self._run_vectorized(df)
+            else:
+                self._run_loop(df)
+        return pd.DataFrame(self.trades)
+
+    def _load_data(self):
         if not os.path.exists(self.data_path):
             print(f"Error: Data file {self.data_path} not found.")
-            return
+            return None
             
         print(f"Loading data from: {self.data_path}...")
-        try:
-            df = pd.read_csv(self.data_path, sep='\t')
-        except:
-            df = pd.read_csv(self.data_path)
-        
-        # Datetime processing
-        # Exness data is UTC. We work in UTC but align with Terminal Time (UTC+2)
-        df['datetime'] = pd.to_datetime(df['<DATE>'] + ' ' + df['<TIME>'])
-        df.set_index('datetime', inplace=True)
+        if os.path.isdir(self.data_path):
+            df = self._load_partitions()
+        else:
+            # 5m bars from the candle store (parsed once, memory-mapped afterwards);
+            # a date range is a slice of the maps, so only its rows are read
+            # Exness data is UTC. We work in UTC but align with Terminal Time (UTC+2)
+            store = CandleStore.open(self.data_path)
+            df = store.frame('5m', self.start, self.end)
+            self._store_index = df.index
+            self._day_offsets = store.day_offsets('5m', self.start, self.end)[1]
         
         # Mid-Price discovery: Client uses Bid + Spread*0.01/2
-        df['high_mid'] = df['<HIGH>'] + (df['<SPREAD>'] * 0.01 / 2)
-        df['low_mid']  = df['<LOW>']  + (df['<SPREAD>'] * 0.01 / 2)
-        df['close_mid'] = df['<CLOSE>'] + (df['<SPREAD>'] * 0.01 / 2)
-        
-        # Strategy Parameters
-        # Verified: Client 02:45-03:55 session is UTC-based
-        RANGE_START_UTC = "02:45" 
-        RANGE_END_UTC   = "03:55" 
-        ENTRY_LIMIT_UTC = "12:30" # 6 PM IST
-        EXIT_TIME_UTC   = "13:40" # 7:15 PM IST
-        
-        BUFF_PERC = 0.0005 # 0.05%
-        
-        # v1 parameters
-        TGT_PERC  = 0.0070 # 0.70%
-        SL_PERC   = 0.0030 # 0.30%
-        TSL_ACTIVATE_PERC = 0.0040 # 0.40%
-        TSL_TRAIL_COORD   = 0.0020 # 0.20% locked profit level
-        
-        # v2 parameters
-        TGT_PTS_V2 = 700
-        SL_PTS_V2 = 300
-        TSL_ACTIVATE_PERC_V2 = 0.0040 # 0.40%
-        TSL_TRAIL_PTS_V2 = 200
-        
-        # Strategy State
-        current_date = None
-        daily_trade_taken = False
-        active_position = None 
-        
-        print(f"Running full backtest for {self.exchange_name} (Mid-Price Logic)...")
-        
-        unique_dates = sorted(list(set(df.index.date)))
-        
-        for row_date in unique_dates:
-            day_data = df[df.index.date == row_date]
-            if day_data.empty: continue
-            
-            # Reset daily state
-            session_high = -1.0
-            session_low = 999999999.0
-            daily_trade_taken = False
-            
-            # 1. Define Session Range 
-            session_mask = (day_data.index.time >= pd.Timestamp(RANGE_START_UTC).time()) & \
-                           (day_data.index.time <= pd.Timestamp(RANGE_END_UTC).time())
-            session_data = day_data[session_mask]
-            
-            if session_data.empty: continue
-            
-            session_high = session_data['high_mid'].max()
-            session_low  = session_data['low_mid'].min()
-            
+        half_spread = df['spread'] * 0.01 / 2 if 'spread' in df else 0.0
+        df['high_mid'] = df['high'] + half_spread
+        df['low_mid']  = df['low']  + half_spread
+        df['close_mid'] = df['close'] + half_spread
+        return df
+
+    def _load_partitions(self):
+        # Monthly partitions from fetcher.fetch_incremental: only the months
+        # overlapping start..end are read (no spread column, so mid = price)
+        from src.data_loader.fetcher import load_partitions
+        day = lambda d: None if d is None else str(pd.Timestamp(d).date())
+        df = load_partitions(self.data_path, day(self.start), day(self.end)).set_index('datetime')
+        if self.start is not None:
+            df = df[df.index >= pd.Timestamp(self.start).normalize()]
+        if self.end is not None:
+            df = df[df.index < pd.Timestamp(self.end).normalize() + pd.Timedelta(days=1)]
+        return df.drop(columns=['timestamp'])
+
+    def _day_ranges(self, df, day_from=None):
+        # Store frames come with per-day row offsets; anything else is grouped here
+        if self._store_index is not None and df.index is self._store_index:
+            starts, ends, order = self._day_offsets[:-1], self._day_offsets[1:], None
+        else:
+            starts, ends, order = day_bounds(df.index.values.astype('int64'))
+        if day_from is not None:
+            ts = df.index.values.astype('int64')
+            first_ts = ts[starts] if order is None else ts[order][starts]
+            keep = first_ts // DAY_NS >= day_from
+            starts, ends = starts[keep], ends[keep]
+        return starts, ends, order
+
+    # -------------------------------------------------------------------------
+    # Incremental runs: data/cache/results/<results>.meta.json records the
+    # parameters, the last day simulated and a hash of every bar before it.
+    # -------------------------------------------------------------------------
+
+    def _run_params(self):
+        params = {name: globals()[name] for name in STRATEGY_PARAMS}
+        params.update({
+            'strategy_version': self.strategy_version,
+            'fee_pct': self.fee_pct,
+            'spread_pct': self.spread_pct,
+            'skip_days': sorted(str(d) for d in self.skip_days),
+            'start': None if self.start is None else str(self.start),
+            'end': None if self.end is None else str(self.end),
+        })
+        return params
+
+    def _data_hash(self, df, through_day):
+        # Hash of the bars the strategy sees on every day before through_day
+        ts = df.index.values.astype('int64')
+        rows = np.searchsorted(ts, through_day * DAY_NS)
+        h = hashlib.blake2b()
+        h.update(np.ascontiguousarray(ts[:rows]))
+        for col in ['high_mid', 'low_mid', 'close_mid']:
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)[:rows]))
+        return h.hexdigest()
+
+    def _resume_point(self, df):
+        path = self._results_path()
+        try:
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        if not os.path.exists(path) or meta.get('params') != self._run_params():
+            return None, None
+        if not df.index.is_monotonic_increasing or self._data_hash(df, meta['through_day']) != meta['data_hash']:
+            print("Data changed since the last run, re-running all days.")
+            return None, None
+
+        # Keep the rows of days before through_day; that day may have been partial
+        through_date = str(pd.Timestamp(meta['through_day'] * DAY_NS).date()).encode()
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        keep_bytes = len(lines[0])
+        for line in lines[1:]:
+            if line[:10] >= through_date:
+                break
+            keep_bytes += len(line)
+        return meta['through_day'], keep_bytes
+
+    def _write_run_meta(self, df):
+        through_day = int(df.index.values.astype('int64').max() // DAY_NS)
+        meta = {
+            'params': self._run_params(),
+            'through_day': through_day,
+            'data_hash': self._data_hash(df, through_day),
+        }
+        path = self._meta_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def strategy(self):
+        """
+        A SessionBreakout set up with this module's parameters for
+        self.strategy_version (the same object TradingBot trades with).
+        """
+        v1 = self.strategy_version == 'v1'
+        return SessionBreakout(
+            self.strategy_version, buffer_pct=BUFF_PERC, sl_pct=SL_PERC, tp_pct=TGT_PERC,
+            tsl_activate_pct=TSL_ACTIVATE_PERC if v1 else TSL_ACTIVATE_PERC_V2, tsl_trail_pct=TSL_TRAIL_COORD,
+            sl_pts=SL_PTS_V2, tp_pts=TGT_PTS_V2, tsl_trail_pts=TSL_TRAIL_PTS_V2,
+            range_start=tod_ms(RANGE_START_UTC), range_end=tod_ms(RANGE_END_UTC),
+            entry_limit=tod_ms(ENTRY_LIMIT_UTC), exit_time=tod_ms(EXIT_TIME_UTC),
+        )
+
+    def _run_loop(self, df, day_from=None):
+        # Bar by bar through the shared strategy core, as the live bot runs
+        ts = df.index.values.astype('int64') // 10**6
+        high = df['high_mid'].to_numpy(dtype=np.float64)
+        low = df['low_mid'].to_numpy(dtype=np.float64)
+        close = df['close_mid'].to_numpy(dtype=np.float64)
+
+        day_starts, day_ends, order = self._day_ranges(df, day_from)
+        if order is not None:
+            ts, high, low, close = ts[order], high[order], low[order], close[order]
+
+        strategy = self.strategy()
+        update = strategy.update
+        for s, e in zip(day_starts, day_ends):
+            if pd.Timestamp(int(ts[s]), unit='ms').date() in self.skip_days: continue
+
+            active_position = None
+            for t, h, l, c in zip(ts[s:e].tolist(), high[s:e].tolist(), low[s:e].tolist(), close[s:e].tolist()):
+                decision = update(t, h, l, c)
+                if decision is None:
+                    continue
+                if decision[0] == 'entry':
+                    active_position = {
+                        'date': pd.Timestamp(t, unit='ms').date(),
+                        'type': decision[1],
+                        'entry_time': pd.Timestamp(t, unit='ms'),
+                        'entry_price': decision[2],
+                        'sl': strategy.sl,
+                        'tp': strategy.tp,
+                        'status': 'open',
+                        'trailing_active': False
+                    }
+                else:
+                    self._record_exit(active_position, strategy, decision)
+                    active_position = None
+
+            # Close EOD if still open
+            decision = strategy.end_of_day()
+            if decision is not None:
+                self._record_exit(active_position, strategy, decision)
+
+    def _record_exit(self, trade, strategy, decision):
+        trade['sl'] = strategy.sl
+        trade['trailing_active'] = strategy.trailing
+        self._close_trade(trade, pd.Timestamp(strategy.exit_ts, unit='ms'), decision[2], decision[1])
+        self.trades.append(trade)
+
+    def _run_vectorized(self, df, day_from=None):
+        # Same rules as _run_loop, but each day is a contiguous slice of NumPy
+        # arrays and every "first bar where ..." scan is a single argmax.
+        ts = df.index.values.astype('int64')
+        high = df['high_mid'].to_numpy(dtype=np.float64)
+        low = df['low_mid'].to_numpy(dtype=np.float64)
+        close = df['close_mid'].to_numpy(dtype=np.float64)
+
+        day_starts, day_ends, order = self._day_ranges(df, day_from)
+        if order is not None:
+            ts, high, low, close = ts[order], high[order], low[order], close[order]
+        tod = ts % DAY_NS
+
+        range_start = tod_ns(RANGE_START_UTC)
+        range_end = tod_ns(RANGE_END_UTC)
+        entry_limit = tod_ns(ENTRY_LIMIT_UTC)
+        exit_time = tod_ns(EXIT_TIME_UTC)
+        v1 = self.strategy_version == 'v1'
+
+        if self.skip_days:
+            skip = np.isin(pd.to_datetime(ts[day_starts] // DAY_NS * DAY_NS).date, list(self.skip_days))
+            day_starts, day_ends = day_starts[~skip], day_ends[~skip]
+
+        for s, e in zip(day_starts, day_ends):
+            t = tod[s:e]
+            session = (t >= range_start) & (t <= range_end)
+            if not session.any(): continue
+
+            # fmax/fmin skip NaN like pandas max()/min()
+            session_high = np.fmax.reduce(high[s:e][session])
+            session_low = np.fmin.reduce(low[s:e][session])
+
             buy_trigger = session_high * (1 + BUFF_PERC)
             sell_trigger = session_low * (1 - BUFF_PERC)
-            
-            # 2. Trade Scanning
-            trade_mask = (day_data.index.time > pd.Timestamp(RANGE_END_UTC).time()) & \
-                         (day_data.index.time <= pd.Timestamp(EXIT_TIME_UTC).time())
-            trade_data = day_data[trade_mask]
-            
-            if trade_data.empty: continue
-            
-            for t_time, row in trade_data.iterrows():
-                # Case A: No active position, look for entry
-                if not active_position:
-                    if daily_trade_taken: continue
-                    if t_time.time() > pd.Timestamp(ENTRY_LIMIT_UTC).time(): continue
-                    
-                    # Check Buy
-                    if row['high_mid'] >= buy_trigger:
-                        entry_price = buy_trigger
-                        sl_price = entry_price * (1 - SL_PERC) if self.strategy_version == 'v1' else entry_price - SL_PTS_V2
-                        tp_price = entry_price * (1 + TGT_PERC) if self.strategy_version == 'v1' else entry_price + TGT_PTS_V2
-                        
-                        active_position = {
-                            'date': row_date,
-                            'type': 'buy',
-                            'entry_time': t_time,
-                            'entry_price': entry_price,
-                            'sl': sl_price,
-                            'tp': tp_price,
-                            'status': 'open',
-                            'trailing_active': False
-                        }
-                        daily_trade_taken = True
-                    # Check Sell
-                    elif row['low_mid'] <= sell_trigger:
-                        entry_price = sell_trigger
-                        sl_price = entry_price * (1 + SL_PERC) if self.strategy_version == 'v1' else entry_price + SL_PTS_V2
-                        tp_price = entry_price * (1 - TGT_PERC) if self.strategy_version == 'v1' else entry_price - TGT_PTS_V2
-                        
-                        active_position = {
-                            'date': row_date,
-                            'type': 'sell',
-                            'entry_time': t_time,
-                            'entry_price': entry_price,
-                            'sl': sl_price,
-                            'tp': tp_price,
-                            'status': 'open',
-                            'trailing_active': False
-                        }
-                        daily_trade_taken = True
-                
-                # Case B: Manage active position
+
+            trade = (t > range_end) & (t <= exit_time)
+            if not trade.any(): continue
+
+            th = high[s:e][trade]
+            tl = low[s:e][trade]
+            tt = t[trade]
+            t_ts = ts[s:e][trade]
+
+            # Entry: first bar before the entry limit that breaks either trigger (buy wins ties)
+            buy_hit = th >= buy_trigger
+            sell_hit = tl <= sell_trigger
+            entry_hit = (buy_hit | sell_hit) & (tt <= entry_limit)
+            if not entry_hit.any(): continue
+            i = int(entry_hit.argmax())
+
+            if buy_hit[i]:
+                side = 'buy'
+                entry_price = buy_trigger
+                sl_price = entry_price * (1 - SL_PERC) if v1 else entry_price - SL_PTS_V2
+                tp_price = entry_price * (1 + TGT_PERC) if v1 else entry_price + TGT_PTS_V2
+                if v1:
+                    tsl_trigger = entry_price * (1 + TSL_ACTIVATE_PERC)
+                    tsl_price = entry_price * (1 - TSL_TRAIL_COORD)
                 else:
-                    curr_h = row['high_mid']
-                    curr_l = row['low_mid']
-                    
-                    if active_position['type'] == 'buy':
-                        # TSL Activation
-                        if not active_position['trailing_active']:
-                            if self.strategy_version == 'v1':
-                                if curr_h >= active_position['entry_price'] * (1 + TSL_ACTIVATE_PERC):
-                                    active_position['trailing_active'] = True
-                                    active_position['sl'] = active_position['entry_price'] * (1 - TSL_TRAIL_COORD)
-                            else: # v2
-                                if curr_h >= active_position['entry_price'] * (1 + TSL_ACTIVATE_PERC_V2):
-                                    active_position['trailing_active'] = True
-                                    active_position['sl'] = active_position['entry_price'] - TSL_TRAIL_PTS_V2
-                        
-                        # Stop Loss
-                        if curr_l <= active_position['sl']:
-                            reason = 'TSL HIT' if active_position['trailing_active'] else 'StopLoss'
-                            self._close_trade(active_position, t_time, active_position['sl'], reason)
-                            self.trades.append(active_position)
-                            active_position = None
-                            continue
-                        # Target
-                        if curr_h >= active_position['tp']:
-                            self._close_trade(active_position, t_time, active_position['tp'], 'Target')
-                            self.trades.append(active_position)
-                            active_position = None
-                            continue
-                            
-                    else: # SELL
-                        if not active_position['trailing_active']:
-                            if self.strategy_version == 'v1':
-                                if curr_l <= active_position['entry_price'] * (1 - TSL_ACTIVATE_PERC):
-                                    active_position['trailing_active'] = True
-                                    active_position['sl'] = active_position['entry_price'] * (1 + TSL_TRAIL_COORD)
-                            else: # v2
-                                if curr_l <= active_position['entry_price'] * (1 - TSL_ACTIVATE_PERC_V2):
-                                    active_position['trailing_active'] = True
-                                    active_position['sl'] = active_position['entry_price'] + TSL_TRAIL_PTS_V2
-                        
-                        if curr_h >= active_position['sl']:
-                            reason = 'TSL HIT' if active_position['trailing_active'] else 'StopLoss'
-                            self._close_trade(active_position, t_time, active_position['sl'], reason)
-                            self.trades.append(active_position)
-                            active_position = None
-                            continue
-                        if curr_l <= active_position['tp']:
-                            self._close_trade(active_position, t_time, active_position['tp'], 'Target')
-                            self.trades.append(active_position)
-                            active_position = None
-                            continue
-            
-            # Close EOD if still open
-            if active_position:
-                last_candle = trade_data.iloc[-1]
-                self._close_trade(active_position, trade_data.index[-1], last_candle['close_mid'], 'TimeExit')
-                self.trades.append(active_position)
-                active_position = None
+                    tsl_trigger = entry_price * (1 + TSL_ACTIVATE_PERC_V2)
+                    tsl_price = entry_price - TSL_TRAIL_PTS_V2
+            else:
+                side = 'sell'
+                entry_price = sell_trigger
+                sl_price = entry_price * (1 + SL_PERC) if v1 else entry_price + SL_PTS_V2
+                tp_price = entry_price * (1 - TGT_PERC) if v1 else entry_price - TGT_PTS_V2
+                if v1:
+                    tsl_trigger = entry_price * (1 - TSL_ACTIVATE_PERC)
+                    tsl_price = entry_price * (1 + TSL_TRAIL_COORD)
+                else:
+                    tsl_trigger = entry_price * (1 - TSL_ACTIVATE_PERC_V2)
+                    tsl_price = entry_price + TSL_TRAIL_PTS_V2
 
-        self._summarize()
+            active_position = {
+                'date': pd.Timestamp(t_ts[i]).date(),
+                'type': side,
+                'entry_time': pd.Timestamp(t_ts[i]),
+                'entry_price': entry_price,
+                'sl': sl_price,
+                'tp': tp_price,
+                'status': 'open',
+                'trailing_active': False
+            }
+
+            # Management starts on the bar after entry
+            h = th[i + 1:]
+            l = tl[i + 1:]
+            n = len(h)
+            if side == 'buy':
+                tsl_hit = h >= tsl_trigger
+                tp_hit = h >= tp_price
+            else:
+                tsl_hit = l <= tsl_trigger
+                tp_hit = l <= tp_price
+            # TSL activates before the stop check on the same bar
+            a = int(tsl_hit.argmax()) if tsl_hit.any() else n
+            stop = np.where(np.arange(n) < a, sl_price, tsl_price)
+            sl_hit = (l <= stop) if side == 'buy' else (h >= stop)
+            exit_hit = sl_hit | tp_hit
+
+            if exit_hit.any():
+                x = int(exit_hit.argmax())
+                trailing = a <= x
+                exit_time_ts = pd.Timestamp(t_ts[i + 1 + x])
+            else:
+                x = None
+                trailing = a < n
+
+            if trailing:
+                active_position['trailing_active'] = True
+                active_position['sl'] = tsl_price
+
+            if x is None:
+                self._close_trade(active_position, pd.Timestamp(t_ts[-1]), close[s:e][trade][-1], 'TimeExit')
+            elif sl_hit[x]:
+                reason = 'TSL HIT' if trailing else 'StopLoss'
+                self._close_trade(active_position, exit_time_ts, active_position['sl'], reason)
+            else:
+                self._close_trade(active_position, exit_time_ts, active_position['tp'], 'Target')
+            self.trades.append(active_position)
 
     def _close_trade(self, trade, exit_time, exit_price, reason):
         trade['exit_time'] = exit_time
@@ -211,11 +426,43 @@ class Backtester:
             trade['pnl'] = trade['entry_price'] - exit_price
             trade['pnl_pct'] = (trade['entry_price'] / exit_price - 1) * 100
             
-    def _summarize(self):
+    def _meta_path(self):
+        # Run metadata is a cache, so it lives under data/cache, not next to
+        # the tracked results
+        name = os.path.basename(self._results_path()).replace('.csv', '.meta.json')
+        return os.path.join(CACHE_DIR, 'results', name)
+
+    def _results_path(self):
+        output_dir = 'data/results'
+        filename_suffix = "_v2" if self.strategy_version == 'v2' else ""
+        filename = f"{self.exchange_name.lower()}{filename_suffix}_results.csv"
+        return os.path.join(output_dir, filename)
+
+    def _summarize(self, keep_bytes=None):
+        # keep_bytes: incremental run, keep that many bytes of the existing file and append
         df_trades = pd.DataFrame(self.trades)
-        if df_trades.empty:
+        if df_trades.empty and keep_bytes is None:
             print("No trades executed.")
-            return
+            return False
+
+        # Save results for dashboard
+        path = self._results_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if keep_bytes is None:
+            df_trades.to_csv(path, index=False)
+        else:
+            with open(path, 'r+b') as f:
+                f.truncate(keep_bytes)
+            if df_trades.empty:
+                print("No trades on the re-simulated days.")
+            else:
+                print(f"Appended {len(df_trades)} trades from the re-simulated days.")
+                df_trades.to_csv(path, mode='a', header=False, index=False)
+            # The summary covers every day in the file, not just this run's
+            df_trades = pd.read_csv(path)
+            if df_trades.empty:
+                print("No trades executed.")
+                return True
             
         total_pnl = df_trades['pnl'].sum()
         total_pnl_pct = df_trades['pnl_pct'].sum()
@@ -226,25 +473,267 @@ class Backtester:
         print(f"Win Rate: {win_rate:.2f}%")
         print(f"Net PnL (Points): {total_pnl:.2f}")
         print(f"Net PnL (%): {total_pnl_pct:.2f}%")
-        
-        # Save results for dashboard
-        output_dir = 'data/results'
-        os.makedirs(output_dir, exist_ok=True)
-        filename_suffix = "_v2" if self.strategy_version == 'v2' else ""
-        filename = f"{self.exchange_name.lower()}{filename_suffix}_results.csv"
-        path = os.path.join(output_dir, filename)
-        
-        df_trades.to_csv(path, index=False)
         print(f"Results successfully exported to {path}")
+        return True
+
+# Tunable v1 parameters accepted by PriceGrid.evaluate, with their Backtester defaults
+PARAM_NAMES = ('BUFF_PERC', 'TGT_PERC', 'SL_PERC', 'TSL_ACTIVATE_PERC', 'TSL_TRAIL_COORD')
+PARAM_DEFAULTS = {
+    'BUFF_PERC': BUFF_PERC,
+    'TGT_PERC': TGT_PERC,
+    'SL_PERC': SL_PERC,
+    'TSL_ACTIVATE_PERC': TSL_ACTIVATE_PERC,
+    'TSL_TRAIL_COORD': TSL_TRAIL_COORD,
+}
+
+# Exit reason codes returned by PriceGrid.simulate
+REASONS = ('-', 'StopLoss', 'TSL HIT', 'Target', 'TimeExit')
+
+class PriceGrid:
+    """
+    Mid-price highs/lows packed into dense day x intraday-slot arrays (NaN where a
+    bar is missing), for evaluating many v1 parameter sets at once.
+
+    Parameter sets broadcast along their own axis, so P combos over D days cost
+    a handful of (D, P) array ops: every "first bar at or after j that crosses a
+    level" lookup is answered from a per-day sparse max table in log2(slots)
+    steps. For a single combo the trades match Backtester(strategy_version='v1').
+    """
+    def __init__(self, df, bar_minutes=5, chunk_cells=500_000):
+        ts = df.index.values.astype('int64')
+        bar_ns = bar_minutes * 60 * 10**9
+        if len(ts) and (ts % bar_ns != 0).any():
+            raise ValueError(f"Bars are not aligned to a {bar_minutes}m grid")
+
+        days, day_idx = np.unique(ts // DAY_NS, return_inverse=True)
+        slot = (ts % DAY_NS) // bar_ns
+        n_slots = DAY_NS // bar_ns
+
+        cell = day_idx * n_slots + slot
+        if len(np.unique(cell)) != len(cell):
+            raise ValueError("Duplicate bars for the same day/slot")
+
+        shape = (len(days), n_slots)
+        high = np.full(shape, np.nan)
+        low = np.full(shape, np.nan)
+        close = np.full(shape, np.nan)
+        present = np.zeros(shape, dtype=bool)
+        high.flat[cell] = df['high_mid'].to_numpy(dtype=np.float64)
+        low.flat[cell] = df['low_mid'].to_numpy(dtype=np.float64)
+        close.flat[cell] = df['close_mid'].to_numpy(dtype=np.float64)
+        present.flat[cell] = True
+
+        self._set_arrays(days, high, low, close, present, chunk_cells)
+
+    @classmethod
+    def from_arrays(cls, days, high, low, close, present, chunk_cells=500_000):
+        # Wraps existing grid arrays (e.g. shared memory) without copying them
+        grid = cls.__new__(cls)
+        grid._set_arrays(days, high, low, close, present, chunk_cells)
+        return grid
+
+    def arrays(self):
+        return {'days': self.days, 'high': self.high, 'low': self.low, 'close': self.close, 'present': self.present}
+
+    def _set_arrays(self, days, high, low, close, present, chunk_cells):
+        self.days = days
+        self.high = high
+        self.low = low
+        self.close = close
+        self.present = present
+        self.chunk_cells = chunk_cells
+        self.dates = pd.to_datetime(days * DAY_NS).date
+        self.slot_tod = np.arange(high.shape[1], dtype=np.int64) * (DAY_NS // high.shape[1])
+        self._prepare()
+
+    @classmethod
+    def from_file(cls, data_path, start=None, end=None, **kwargs):
+        df = Backtester(data_path, start=start, end=end)._load_data()
+        if df is None:
+            return None
+        return cls(df, **kwargs)
+
+    def _prepare(self):
+        # Parameter-independent per-day quantities, computed once
+        tod = self.slot_tod
+        session = (tod >= tod_ns(RANGE_START_UTC)) & (tod <= tod_ns(RANGE_END_UTC))
+        trade = (tod > tod_ns(RANGE_END_UTC)) & (tod <= tod_ns(EXIT_TIME_UTC))
+
+        # fmax/fmin skip missing bars; days without session bars stay NaN
+        self.session_high = np.fmax.reduce(np.where(self.present[:, session], self.high[:, session], np.nan), axis=1)
+        self.session_low = np.fmin.reduce(np.where(self.present[:, session], self.low[:, session], np.nan), axis=1)
+
+        present = self.present[:, trade]
+        high = np.where(present, self.high[:, trade], -np.inf)
+        neg_low = np.where(present, -self.low[:, trade], -np.inf)
+        high[np.isnan(high)] = -np.inf
+        neg_low[np.isnan(neg_low)] = -np.inf
+
+        n_days, n_trade = high.shape
+        self.n_trade = n_trade
+        self.n_entry = int((tod[trade] <= tod_ns(ENTRY_LIMIT_UTC)).sum())
+
+        # Time exit: close of the last bar present in the trade window
+        last = n_trade - 1 - present[:, ::-1].argmax(axis=1)
+        self.exit_close = self.close[:, trade][np.arange(n_days), last]
+        self.exit_slot = last
+
+        # Sparse max table over [high; -low]: rows 0..D-1 are highs, D..2D-1 are
+        # negated lows, so "low <= x" becomes "-low >= -x" on the same table.
+        # Blocks running past the last slot read +inf, so a search always stops
+        # at n_trade without a bounds check.
+        level = np.concatenate([high, neg_low])
+        level = np.concatenate([level, np.full((len(level), 1), np.inf)], axis=1)
+        self._width = n_trade + 1
+        self._table = [level.ravel()]
+        step = 1
+        while step * 2 <= n_trade:
+            nxt = np.full_like(level, np.inf)
+            nxt[:, :-step] = np.maximum(level[:, :-step], level[:, step:])
+            self._table.append(nxt.ravel())
+            level = nxt
+            step *= 2
+
+    def _first_touch(self, row, start, threshold):
+        # First slot j >= start in `row` whose value is >= threshold (n_trade if none)
+        base = row * self._width
+        idx = base + start
+        threshold = np.where(np.isnan(threshold), np.inf, threshold)
+        for k in range(len(self._table) - 1, -1, -1):
+            idx += (self._table[k][idx] < threshold) * (1 << k)
+        return idx - base
+
+    def _params(self, params):
+        params = dict(params)
+        unknown = set(params) - set(PARAM_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+        values = np.broadcast_arrays(*[np.atleast_1d(np.asarray(params.get(k, PARAM_DEFAULTS[k]), dtype=np.float64))
+                                       for k in PARAM_NAMES])
+        return {k: v.ravel() for k, v in zip(PARAM_NAMES, values)}
+
+    def simulate(self, params):
+        """
+        Runs every parameter set in `params` (a mapping of PARAM_NAMES to scalars
+        or equal-length arrays; missing names use the defaults) over every day.
+        Returns a dict of (P, D) arrays: side (1 buy, -1 sell, 0 no trade),
+        entry_slot, exit_slot, entry_price, exit_price, reason (index into
+        REASONS), trailing_active, pnl and pnl_pct.
+        """
+        parts = list(self._chunks(self._params(params)))
+        return {k: np.concatenate([part[k] for part in parts]) for k in parts[0]}
+
+    def _chunks(self, p):
+        # Bounds memory to ~chunk_cells (combo, day) cells per pass
+        n_combos = len(p['BUFF_PERC'])
+        chunk = max(1, self.chunk_cells // max(len(self.days), 1))
+        for i in range(0, n_combos, chunk):
+            yield self._simulate_chunk({k: v[i:i + chunk] for k, v in p.items()})
+
+    def _simulate_chunk(self, p):
+        # Works on (D, P) arrays so consecutive lookups hit the same table row
+        n = self.n_trade
+        n_days = len(self.days)
+        day = np.arange(n_days)[:, None]
+        col = lambda name: p[name][None, :]
+
+        # Entries depend on BUFF_PERC only, so each distinct buffer is resolved once
+        buffs, combo_buff = np.unique(p['BUFF_PERC'], return_inverse=True)
+        buy_trigger = self.session_high[:, None] * (1 + buffs[None, :])
+        sell_trigger = self.session_low[:, None] * (1 - buffs[None, :])
+
+        zero = np.zeros(buy_trigger.shape, dtype=np.int64)
+        buy_at = self._first_touch(day + zero, zero, buy_trigger)
+        sell_at = self._first_touch(day + n_days + zero, zero, -sell_trigger)
+        buy_at[buy_at >= self.n_entry] = n
+        sell_at[sell_at >= self.n_entry] = n
+
+        buy_at, sell_at = buy_at[:, combo_buff], sell_at[:, combo_buff]
+        buy_trigger, sell_trigger = buy_trigger[:, combo_buff], sell_trigger[:, combo_buff]
+
+        entry = np.minimum(buy_at, sell_at)
+        entered = entry < n
+        buy = entered & (buy_at <= sell_at) # buy wins if both trigger on one bar
+        sign = np.where(buy, 1.0, -1.0)
+        entry_price = np.where(buy, buy_trigger, sell_trigger)
+
+        sl_price = entry_price * (1 - sign * col('SL_PERC'))
+        tp_price = entry_price * (1 + sign * col('TGT_PERC'))
+        tsl_trigger = entry_price * (1 + sign * col('TSL_ACTIVATE_PERC'))
+        tsl_price = entry_price * (1 - sign * col('TSL_TRAIL_COORD'))
+
+        # Favourable moves are read from highs for buys and from -lows for sells
+        fav = np.where(buy, day, day + n_days)
+        adv = np.where(buy, day + n_days, day)
+        after = np.minimum(entry + 1, n)
+        active_at = self._first_touch(fav, after, sign * tsl_trigger)
+        tp_at = self._first_touch(fav, after, sign * tp_price)
+        sl_at = self._first_touch(adv, after, -sign * sl_price)
+        tsl_at = self._first_touch(adv, active_at, -sign * tsl_price)
+
+        # TSL activates before the stop check on the same bar
+        stop_at = np.where(sl_at < active_at, sl_at, tsl_at)
+        exit_at = np.minimum(stop_at, tp_at)
+        closed = exit_at < n
+        stopped = closed & (stop_at <= tp_at)
+        trailing = entered & np.where(closed, active_at <= exit_at, active_at < n)
+
+        exit_price = np.where(stopped, np.where(trailing, tsl_price, sl_price),
+                              np.where(closed, tp_price, self.exit_close[:, None]))
+        reason = np.where(stopped, np.where(trailing, 2, 1), np.where(closed, 3, 4))
+        reason[~entered] = 0
+
+        pnl = np.where(entered, sign * (exit_price - entry_price), 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pnl_pct = np.where(buy, (exit_price / entry_price - 1) * 100, (entry_price / exit_price - 1) * 100)
+        pnl_pct[~entered] = 0.0
+
+        out = {
+            'side': np.where(entered, sign, 0).astype(np.int8),
+            'entry_slot': np.where(entered, entry, -1),
+            'exit_slot': np.where(entered, np.where(closed, exit_at, self.exit_slot[:, None]), -1),
+            'entry_price': np.where(entered, entry_price, np.nan),
+            'exit_price': np.where(entered, exit_price, np.nan),
+            'reason': reason.astype(np.int8),
+            'trailing_active': trailing,
+            'pnl': pnl,
+            'pnl_pct': pnl_pct,
+        }
+        return {k: v.T for k, v in out.items()}
+
+    def evaluate(self, params):
+        """
+        Summary metrics per parameter set, one row per combo.
+        """
+        p = self._params(params)
+        metrics = {'trades': [], 'win_rate': [], 'pnl': [], 'pnl_pct': [], 'max_dd_pct': []}
+        for res in self._chunks(p):
+            trades = (res['side'] != 0).sum(axis=1)
+            wins = (res['pnl'] > 0).sum(axis=1)
+            equity = res['pnl_pct'].cumsum(axis=1)
+            if equity.shape[1]:
+                drawdown = (np.maximum.accumulate(equity, axis=1) - equity).max(axis=1)
+            else:
+                drawdown = np.zeros(len(trades))
+            metrics['trades'].append(trades)
+            metrics['win_rate'].append(np.where(trades > 0, wins / np.maximum(trades, 1) * 100, 0.0))
+            metrics['pnl'].append(res['pnl'].sum(axis=1))
+            metrics['pnl_pct'].append(res['pnl_pct'].sum(axis=1))
+            metrics['max_dd_pct'].append(drawdown)
+
+        out = pd.DataFrame(p)
+        for k, v in metrics.items():
+            out[k] = np.concatenate(v)
+        return out
 
 if __name__ == "__main__":
     # Exness BTCUSD raw file
     exness_path = "data/raw/BTCUSDm_M5_202001010000_202601121835.csv"
     if os.path.exists(exness_path):
         print("Running V1 Backtest...")
-        bt_v1 = Backtester(exness_path, 'Exness', strategy_version='v1')
-        bt_v1.run()
+        bt_v1 = Backtester(exness_path, 'Exness', strategy_version='v1', engine='vectorized')
+        bt_v1.run(incremental=True)
         print("\n-----------------------\n")
         print("Running V2 (BTCUSD Abs TGT/SL) Backtest...")
-        bt_v2 = Backtester(exness_path, 'Exness', strategy_version='v2')
-        bt_v2.run()
+        bt_v2 = Backtester(exness_path, 'Exness', strategy_version='v2', engine='vectorized')
+        bt_v2.run(incremental=True)
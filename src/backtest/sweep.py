@@ -0,0 +1,131 @@
+import os
+import time
+from itertools import product
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import PriceGrid, PARAM_NAMES, PARAM_DEFAULTS
+
+# Worker-side state, set once per process by _attach
+_grid = None
+_blocks = []
+
+def param_grid(**axes):
+    """
+    Cartesian product of the given parameter axes, e.g.
+    param_grid(TGT_PERC=[0.005, 0.007], SL_PERC=[0.002, 0.003]).
+    Parameters not given keep their Backtester defaults.
+    """
+    names = [k for k in PARAM_NAMES if k in axes]
+    combos = np.array(list(product(*[np.atleast_1d(axes[k]) for k in names])), dtype=np.float64)
+    params = {k: np.full(len(combos), PARAM_DEFAULTS[k]) for k in PARAM_NAMES}
+    for i, k in enumerate(names):
+        params[k] = combos[:, i]
+    return params
+
+def random_params(n, seed=None, **bounds):
+    """
+    n parameter sets drawn uniformly from (low, high) bounds, e.g.
+    random_params(10000, SL_PERC=(0.001, 0.005)).
+    """
+    rng = np.random.default_rng(seed)
+    params = {k: np.full(n, PARAM_DEFAULTS[k]) for k in PARAM_NAMES}
+    for k, (lo, hi) in bounds.items():
+        params[k] = rng.uniform(lo, hi, n)
+    return params
+
+def _share(arrays):
+    # Copies each array into a named shared memory block
+    blocks, specs = [], {}
+    for name, arr in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+        blocks.append(shm)
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return blocks, specs
+
+def _attach(specs, chunk_cells):
+    global _grid
+    arrays = {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _blocks.append(shm) # keep mapped for the life of the worker
+        arrays[name] = np.ndarray(shape, dtype, buffer=shm.buf)
+    _grid = PriceGrid.from_arrays(chunk_cells=chunk_cells, **arrays)
+
+def _evaluate(batch):
+    start, params = batch
+    out = _grid.evaluate(params)
+    out.insert(0, 'combo', np.arange(start, start + len(out)))
+    return out
+
+def run_sweep(data_path, params, workers=None, batch_size=1000, output_path=None, chunk_cells=500_000,
+              start=None, end=None):
+    """
+    Evaluates every parameter set in `params` (see param_grid / random_params)
+    across a process pool. The raw file is parsed once here; workers attach to
+    a shared-memory copy of the day x slot price grid. Per-combo metrics are
+    appended to a Parquet file as batches finish (if output_path is set) and
+    returned as one DataFrame ordered by combo. start/end limit the sweep to
+    those dates (inclusive).
+    """
+    grid = PriceGrid.from_file(data_path, start=start, end=end, chunk_cells=chunk_cells)
+    if grid is None:
+        return None
+
+    params = {k: np.asarray(v, dtype=np.float64) for k, v in params.items()}
+    n_combos = len(next(iter(params.values())))
+    batches = [(i, {k: v[i:i + batch_size] for k, v in params.items()}) for i in range(0, n_combos, batch_size)]
+    workers = workers or os.cpu_count() or 1
+
+    print(f"Sweeping {n_combos} parameter sets over {len(grid.days)} days with {workers} workers...")
+    t0 = time.perf_counter()
+
+    writer = None
+    parts = []
+    blocks, specs = _share(grid.arrays())
+    try:
+        with Pool(workers, initializer=_attach, initargs=(specs, chunk_cells)) as pool:
+            for part in pool.imap_unordered(_evaluate, batches):
+                parts.append(part)
+                if output_path:
+                    writer = _write_part(writer, output_path, part)
+    finally:
+        if writer is not None:
+            writer.close()
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    results = pd.concat(parts, ignore_index=True).sort_values('combo', ignore_index=True)
+    elapsed = time.perf_counter() - t0
+    print(f"Done in {elapsed:.2f}s ({n_combos / elapsed:.0f} combos/s)")
+    if output_path:
+        print(f"Sweep results saved to {output_path}")
+    return results
+
+def _write_part(writer, output_path, part):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(part, preserve_index=False)
+    if writer is None:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        writer = pq.ParquetWriter(output_path, table.schema)
+    writer.write_table(table)
+    return writer
+
+if __name__ == "__main__":
+    exness_path = "data/raw/BTCUSDm_M5_202001010000_202601121835.csv"
+    if os.path.exists(exness_path):
+        grid = param_grid(
+            BUFF_PERC=np.linspace(0.0, 0.0020, 5),
+            TGT_PERC=np.linspace(0.0040, 0.0120, 9),
+            SL_PERC=np.linspace(0.0015, 0.0060, 10),
+            TSL_ACTIVATE_PERC=np.linspace(0.0020, 0.0080, 7),
+            TSL_TRAIL_COORD=np.linspace(0.0, 0.0030, 4),
+        )
+        results = run_sweep(exness_path, grid, output_path='data/results/exness_sweep.parquet')
+        print(results.sort_values('pnl_pct', ascending=False).head(10).to_string(index=False))
@@ -3,8 +3,14 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import os
+import sys
 import time
 
+# Allow `from src...` imports when launched via `streamlit run src/dashboard/app.py`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+EXNESS_RAW_PATH = "data/raw/BTCUSDm_M5_202001010000_202601121835.csv"
+
 # -----------------------------------------------------------------------------
 # 1. PAGE CONFIGURATION
 # -----------------------------------------------------------------------------
@@ -114,6 +120,14 @@ def load_comp_data():
             })
     return pd.DataFrame(comp_data)
 
+@st.cache_resource
+def load_candle_store(path):
+    # Pre-aggregated 5m/15m/1h/1d bars with per-day offsets (built once per raw file)
+    if not os.path.exists(path):
+        return None
+    from src.data_loader.store import CandleStore
+    return CandleStore.open(path)
+
 def to_excel(df):
     import io
     output = io.BytesIO()
@@ -233,27 +247,65 @@ elif menu == "Strategy DNA":
         """, unsafe_allow_html=True)
         
     st.markdown("### Graphical Logic Representation")
-    # Mock visual of logic
-    dates = pd.date_range("2023-01-01 08:00", periods=20, freq="5min")
-    prices = [100, 101, 102, 101, 100, 102, 104, 105, 106, 105, 106, 107, 108, 108, 107, 106, 105, 104, 103, 102]
-    mock_df = pd.DataFrame({'Time': dates, 'Price': prices})
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=mock_df['Time'], y=mock_df['Price'], mode='lines', name='Price', line=dict(color='white')))
-    # Add box for session
-    fig.add_shape(type="rect",
-        x0=dates[3], y0=100, x1=dates[15], y1=102,
-        line=dict(color="RoyalBlue"), fillcolor="rgba(65, 105, 225, 0.2)",
-    )
-    fig.add_annotation(x=dates[9], y=101, text="Session Range", showarrow=False, font=dict(color="white"))
-    
-    fig.update_layout(
-        title="Session Capture Visualization (Mock)", 
-        template="plotly_dark", 
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=300
-    )
-    st.plotly_chart(fig, width="stretch")
+    store = load_candle_store(EXNESS_RAW_PATH)
+    if store is not None:
+        # Real session capture: one day's bars sliced straight from the candle store
+        trades = load_exchange_data("Exness")
+        day_options = list(trades['date'].astype(str))[::-1] if not trades.empty else [str(d) for d in store.dates('5m')[::-1]]
+        s1, s2 = st.columns([3, 1])
+        with s1:
+            selected_day = st.selectbox("Session Day", day_options)
+        with s2:
+            timeframe = st.radio("Timeframe", ["5m", "15m", "1h"], horizontal=True)
+        
+        day_bars = store.day(selected_day, timeframe)
+        session_bars = store.day(selected_day, '5m').between_time("02:45", "03:55")
+        
+        fig = go.Figure()
+        fig.add_trace(go.Candlestick(x=day_bars.index, open=day_bars['open'], high=day_bars['high'],
+                                     low=day_bars['low'], close=day_bars['close'], name='Price'))
+        if not session_bars.empty:
+            fig.add_shape(type="rect",
+                x0=session_bars.index[0], y0=session_bars['low'].min(), x1=session_bars.index[-1], y1=session_bars['high'].max(),
+                line=dict(color="RoyalBlue"), fillcolor="rgba(65, 105, 225, 0.2)",
+            )
+        if not trades.empty:
+            day_trades = trades[trades['date'].astype(str) == selected_day]
+            for _, t in day_trades.iterrows():
+                fig.add_trace(go.Scatter(x=[t['entry_time'], t['exit_time']], y=[t['entry_price'], t['exit_price']],
+                                         mode='markers+lines', name=f"{t['type'].upper()} ({t['reason']})",
+                                         line=dict(color='#00ff9d' if t['pnl'] > 0 else '#ff4b4b', dash='dot')))
+        
+        fig.update_layout(
+            title=f"Session Capture {selected_day} ({timeframe})", 
+            template="plotly_dark", 
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis_rangeslider_visible=False,
+            height=400
+        )
+        st.plotly_chart(fig, width="stretch")
+    else:
+        # Mock visual of logic
+        dates = pd.date_range("2023-01-01 08:00", periods=20, freq="5min")
+        prices = [100, 101, 102, 101, 100, 102, 104, 105, 106, 105, 106, 107, 108, 108, 107, 106, 105, 104, 103, 102]
+        mock_df = pd.DataFrame({'Time': dates, 'Price': prices})
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=mock_df['Time'], y=mock_df['Price'], mode='lines', name='Price', line=dict(color='white')))
+        # Add box for session
+        fig.add_shape(type="rect",
+            x0=dates[3], y0=100, x1=dates[15], y1=102,
+            line=dict(color="RoyalBlue"), fillcolor="rgba(65, 105, 225, 0.2)",
+        )
+        fig.add_annotation(x=dates[9], y=101, text="Session Range", showarrow=False, font=dict(color="white"))
+        
+        fig.update_layout(
+            title="Session Capture Visualization (Mock)", 
+            template="plotly_dark", 
+            paper_bgcolor='rgba(0,0,0,0)',
+            height=300
+        )
+        st.plotly_chart(fig, width="stretch")
 
 elif menu == "Performance Analytics":
     st.title("📊 Deep Dive Analytics")
@@ -327,20 +379,32 @@ elif menu == "Exchange Intelligence":
 elif menu == "Live Operations":
     st.title("🔴 Live Operations Center")
     
+    # Tail of the bot's JSON-lines log (see live_trade/log.py); read backwards, so cheap on any log size
+    from src.live_trade.log import tail_events
+    records = tail_events(n=200)
+    trades = [r for r in records if r.get('event') in ('entry', 'exit')]
+    position = "NONE"
+    if trades and trades[-1]['event'] == 'entry':
+        position = f"{trades[-1]['side'].upper()} @ {trades[-1]['entry']:,.2f}"
+    signals = sum(1 for r in records if r.get('event') == 'signal')
+    
     c1, c2, c3 = st.columns(3)
     with c1:
-        st.markdown('<div class="card"><h3>Active Position</h3><h1>NONE</h1></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="card"><h3>Active Position</h3><h1>{position}</h1></div>', unsafe_allow_html=True)
     with c2:
-        st.markdown('<div class="card"><h3>Daily PnL</h3><h1 style="color: grey;">$0.00</h1></div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="card"><h3>Recent Signals</h3><h1>{signals}</h1></div>', unsafe_allow_html=True)
     with c3:
-        st.markdown('<div class="card"><h3>Next Session</h3><h1>14h 32m</h1></div>', unsafe_allow_html=True)
+        last_seen = time.strftime('%H:%M:%S', time.localtime(records[-1]['ts'])) if records else "--"
+        st.markdown(f'<div class="card"><h3>Last Log Line</h3><h1>{last_seen}</h1></div>', unsafe_allow_html=True)
         
     st.markdown("### Terminal Output")
-    st.code("""
-    [2026-01-03 15:55:01] INFO: TradingBot Started.
-    [2026-01-03 15:55:02] INFO: Connected to Binance API.
-    [2026-01-03 15:55:05] INFO: Waiting for Session Start (08:15 IST)... (Currently Outside Session)
-    """, language="log")
+    if records:
+        st.code("\n".join(
+            f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['ts']))}] {r['level']}: {r['msg']}"
+            for r in records[-30:]
+        ), language="log")
+    else:
+        st.info("No bot log yet. Start the bot with `python main.py bot`.")
     
     col_a, col_b = st.columns(2)
     with col_a:
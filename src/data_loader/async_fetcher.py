@@ -0,0 +1,147 @@
+import asyncio
+from datetime import datetime, timezone
+
+import ccxt
+import ccxt.async_support as ccxt_async
+
+from src.data_loader.fetcher import append_partitions, last_stored_timestamp, partition_dir
+
+def _make_exchange():
+    # ccxt's throttler keeps the shared client under the venue's rate limit
+    return ccxt_async.delta({'enableRateLimit': True})
+
+def split_windows(start_ms, end_ms, window_ms):
+    windows = []
+    while start_ms < end_ms:
+        windows.append((start_ms, min(start_ms + window_ms, end_ms)))
+        start_ms += window_ms
+    return windows
+
+async def _fetch_window(exchange, symbol, timeframe, start_ms, end_ms, semaphore, limit, retries):
+    # Pages through [start_ms, end_ms) sequentially; windows run side by side
+    rows = []
+    since = start_ms
+    failures = 0
+    while since < end_ms:
+        try:
+            async with semaphore:
+                page = await exchange.fetch_ohlcv(symbol, timeframe, since, limit=limit)
+        except Exception as e:
+            failures += 1
+            print(f"Error fetching {symbol} {timeframe} @ {since}: {e}")
+            if failures > retries:
+                raise
+            await asyncio.sleep(min(2 ** failures, 30)) # Backoff
+            continue
+        failures = 0
+
+        page = [c for c in page if since <= c[0] < end_ms]
+        if not page:
+            break
+        rows.extend(page)
+        since = page[-1][0] + 1
+    return rows
+
+def stitch(windows):
+    """
+    Merges per-window OHLCV lists into one series ordered by timestamp,
+    keeping the first copy of any candle returned by two windows.
+    """
+    merged = {}
+    for rows in windows:
+        for row in rows:
+            merged.setdefault(row[0], row)
+    return [merged[ts] for ts in sorted(merged)]
+
+async def _download_one(exchange, symbol, timeframe, start_date, data_dir, semaphore, window_pages, limit, retries):
+    out_dir = partition_dir(symbol, timeframe, data_dir)
+    tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+    last = last_stored_timestamp(out_dir)
+    if last is not None:
+        start_ms = last + 1
+    else:
+        start_ms = int(datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+    # Only closed candles are stored
+    now = int(datetime.now(timezone.utc).timestamp() * 1000)
+    end_ms = now - now % tf_ms
+
+    windows = split_windows(start_ms, end_ms, window_pages * limit * tf_ms)
+    print(f"{symbol} {timeframe}: {len(windows)} windows from {datetime.fromtimestamp(start_ms / 1000, timezone.utc)}")
+
+    tasks = [asyncio.ensure_future(_fetch_window(exchange, symbol, timeframe, s, e, semaphore, limit, retries))
+             for s, e in windows]
+    index = {task: i for i, task in enumerate(tasks)}
+    pending = set(tasks)
+    results = {}
+    next_window = 0
+    added = 0
+    failed_at, error = len(windows), None
+    try:
+        while next_window < failed_at:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                i = index[task]
+                if task.cancelled():
+                    continue
+                if task.exception() is None:
+                    results[i] = task.result()
+                elif i < failed_at:
+                    failed_at, error = i, task.exception()
+            # Windows past a failed one could not be stored anyway
+            for task in pending:
+                if index[task] > failed_at:
+                    task.cancel()
+            # Windows are stored in order as soon as all earlier ones are in,
+            # so the partitions stay gap-free and a failed job resumes after
+            # its last stored window
+            while next_window < failed_at and next_window in results:
+                rows = stitch([results.pop(next_window)])
+                if rows:
+                    append_partitions(out_dir, rows)
+                    added += len(rows)
+                next_window += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if error is not None:
+        print(f"{symbol} {timeframe}: failed after storing {added} candles "
+              f"({next_window}/{len(windows)} windows); rerun to resume: {error}")
+        raise error
+    print(f"{symbol} {timeframe}: added {added} candles")
+    return added
+
+async def download_history(jobs, start_date='2021-01-01', exchange=None, data_dir='data/raw',
+                           max_concurrency=8, window_pages=5, limit=1000, retries=5):
+    """
+    Backfills every (symbol, timeframe) in `jobs` into the monthly partitions
+    used by fetch_incremental. Each job's missing range is split into windows
+    of `window_pages` pages; windows and jobs are fetched concurrently with at
+    most `max_concurrency` requests in flight on one shared client.
+    A job whose window fails keeps the windows before it and does not stop
+    the other jobs. Returns {(symbol, timeframe): candles added, or the
+    exception for a failed job}.
+    """
+    own_exchange = exchange is None
+    exchange = exchange or _make_exchange()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    try:
+        results = await asyncio.gather(*[
+            _download_one(exchange, symbol, timeframe, start_date, data_dir, semaphore, window_pages, limit, retries)
+            for symbol, timeframe in jobs
+        ], return_exceptions=True)
+    finally:
+        if own_exchange:
+            await exchange.close()
+    failed = [f"{symbol} {timeframe}" for (symbol, timeframe), r in zip(jobs, results) if isinstance(r, Exception)]
+    if failed:
+        print(f"Failed jobs ({len(failed)}/{len(jobs)}): {', '.join(failed)}")
+    return dict(zip(jobs, results))
+
+def download(jobs, **kwargs):
+    return asyncio.run(download_history(jobs, **kwargs))
+
+if __name__ == "__main__":
+    download([('BTC/USDT', '5m'), ('ETH/USDT', '5m'), ('BTC/USDT', '1h')])
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import os
 from datetime import timedelta
 
@@ -31,12 +32,116 @@ def clean_data(input_file, output_file):
     df.to_csv(output_file, index=False)
     print(f"Cleaned data saved to {output_file}. Rows: {len(df)}")
 
-if __name__ == "__main__":
-    # Auto-detect file from raw dir
-    raw_dir = 'data/raw'
-    files = [f for f in os.listdir(raw_dir) if f.endswith('.csv')]
-    if files:
-        target = files[0] # Pick first for now
-        clean_data(f"{raw_dir}/{target}", f"data/processed/{target}")
+# -----------------------------------------------------------------------------
+# Batch pipeline: every raw file -> typed Parquet + per-day completeness index
+# -----------------------------------------------------------------------------
+
+# Exness session range used by Backtester (UTC, inclusive)
+SESSION_START_UTC = "02:45"
+SESSION_END_UTC = "03:55"
+
+DAY_NS = 24 * 60 * 60 * 10**9
+IST_OFFSET_NS = (5 * 60 + 30) * 60 * 10**9
+
+def _tod_ns(hhmm):
+    h, m = hhmm.split(':')
+    return (int(h) * 60 + int(m)) * 60 * 10**9
+
+def day_index(ts, interval_ns=None):
+    """
+    Per-day completeness for sorted, unique int64 ns timestamps: bar count,
+    intra-day gap count (steps longer than one bar) and whether every bar of
+    the session window is present.
+    """
+    if interval_ns is None:
+        interval_ns = int(np.median(np.diff(ts))) if len(ts) > 1 else 5 * 60 * 10**9
+    day = ts // DAY_NS
+    tod = ts - day * DAY_NS
+    days, starts, bars = np.unique(day, return_index=True, return_counts=True)
+
+    step = np.diff(ts)
+    same_day = day[1:] == day[:-1]
+    gaps = np.bincount(np.searchsorted(days, day[1:][same_day & (step > interval_ns)]), minlength=len(days))
+
+    start, end = _tod_ns(SESSION_START_UTC), _tod_ns(SESSION_END_UTC)
+    in_session = (tod >= start) & (tod <= end)
+    session_bars = np.bincount(np.searchsorted(days, day[in_session]), minlength=len(days))
+    expected = (end - start) // interval_ns + 1
+
+    return pd.DataFrame({
+        'date': pd.to_datetime(days * DAY_NS).date,
+        'bars': bars,
+        'gaps': gaps,
+        'session_bars': session_bars,
+        'session_complete': session_bars >= expected,
+        'first_bar': pd.to_datetime(ts[starts]),
+        'last_bar': pd.to_datetime(ts[starts + bars - 1]),
+    })
+
+def clean_file(source, output_dir='data/processed'):
+    """
+    Cleans one raw file (or monthly partition directory) into
+    <output_dir>/<name>.parquet plus <name>_days.parquet (see day_index).
+    """
+    if os.path.isdir(source):
+        from src.data_loader.fetcher import load_partitions
+        df = load_partitions(source)
+        ts = df['datetime'].values.astype('datetime64[ns]').astype(np.int64)
+        columns = {c: df[c].to_numpy(dtype=np.float64) for c in ['open', 'high', 'low', 'close', 'volume']}
     else:
+        from src.data_loader.ingest import parse_raw
+        ts, columns = parse_raw(source)
+
+    # Sort and drop duplicates (first occurrence wins)
+    order = np.argsort(ts, kind='stable')
+    ts = ts[order]
+    keep = np.r_[True, ts[1:] != ts[:-1]]
+    ts = ts[keep]
+
+    df = pd.DataFrame({'datetime': ts.view('datetime64[ns]'), 'datetime_ist': (ts + IST_OFFSET_NS).view('datetime64[ns]')})
+    for name, values in columns.items():
+        df[name] = values[order][keep]
+
+    days = day_index(ts)
+    name = os.path.splitext(os.path.basename(os.path.normpath(source)))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    df.to_parquet(os.path.join(output_dir, f"{name}.parquet"), index=False)
+    days.to_parquet(os.path.join(output_dir, f"{name}_days.parquet"), index=False)
+
+    return {
+        'source': source,
+        'rows': len(df),
+        'days': len(days),
+        'gap_days': int((days['gaps'] > 0).sum()),
+        'incomplete_sessions': int((~days['session_complete']).sum()),
+    }
+
+def clean_all(raw_dir='data/raw', output_dir='data/processed', workers=None):
+    """
+    Cleans every raw CSV and partition directory in raw_dir in parallel.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    sources = [os.path.join(raw_dir, f) for f in sorted(os.listdir(raw_dir))
+               if f.endswith('.csv') or os.path.isdir(os.path.join(raw_dir, f))]
+    if not sources:
         print("No raw data found to clean.")
+        return pd.DataFrame()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        summary = pd.DataFrame(pool.map(clean_file, sources, [output_dir] * len(sources)))
+    print(summary.to_string(index=False))
+    return summary
+
+def load_day_index(path):
+    """
+    Completeness index keyed by date, e.g. load_day_index(p).loc[date, 'session_complete'].
+    """
+    return pd.read_parquet(path).set_index('date')
+
+def incomplete_days(index):
+    return set(index.index[~index['session_complete'] | (index['gaps'] > 0)])
+
+if __name__ == "__main__":
+    # Clean every file in the raw dir (Parquet + per-day completeness index)
+    clean_all('data/raw', 'data/processed')
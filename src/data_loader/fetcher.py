@@ -1,17 +1,44 @@
 import ccxt
 import pandas as pd
-import time
 from datetime import datetime, timedelta, timezone
 import os
+import json
+import time
+
+from src.utils.rate_limit import HISTORY, scheduler_for
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+MAX_FAILURES = 5 # consecutive failed pages before a fetch gives up
+FAILURE_BACKOFF = 5 # seconds, doubled on each consecutive failure
+
+def _make_exchange():
+    return ccxt.delta({
+        'enableRateLimit': False, # Paced by the venue's RequestScheduler instead
+        # 'options': {'defaultType': 'future'} # Delta default is usually fine, checking docs if needed. 
+    })
 
-def fetch_data(symbol='BTC/USDT', timeframe='5m', start_date='2021-01-01'):
+def _fetch_page(exchange, symbol, timeframe, since):
+    # Backfills ride the lowest-priority lane, so a live bot sharing the
+    # venue's budget is never starved. The scheduler only retries rate
+    # limits; other errors are retried by the caller's loop (_backoff).
+    scheduler = scheduler_for(getattr(exchange, 'id', 'default'))
+    return scheduler.call('fetch_ohlcv', exchange.fetch_ohlcv, symbol, timeframe, since, limit=1000,
+                          priority=HISTORY)
+
+def _backoff(failures, error):
+    # After a failed page: wait before the next attempt, or give up when the
+    # error keeps coming back
+    print(f"Error fetching data: {error}")
+    if failures >= MAX_FAILURES:
+        raise RuntimeError(f"Giving up after {failures} consecutive failures: {error}") from error
+    time.sleep(min(FAILURE_BACKOFF * 2 ** (failures - 1), 60))
+
+def fetch_data(symbol='BTC/USDT', timeframe='5m', start_date='2021-01-01', exchange=None):
     """
     Fetches historical OHLCV data from Binance.
     """
-    exchange = ccxt.delta({
-        'enableRateLimit': True, 
-        # 'options': {'defaultType': 'future'} # Delta default is usually fine, checking docs if needed. 
-    })
+    exchange = exchange or _make_exchange()
     
     # Calculate start time
     start_time = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
@@ -21,38 +48,239 @@ def fetch_data(symbol='BTC/USDT', timeframe='5m', start_date='2021-01-01'):
     print(f"Fetching {symbol} {timeframe} data since {start_time}...")
     
     all_ohlcv = []
+    failures = 0
     
     while since < int(end_time.timestamp() * 1000):
         try:
-            ohlcv = exchange.fetch_ohlcv(symbol, timeframe, since, limit=1000)
+            ohlcv = _fetch_page(exchange, symbol, timeframe, since)
             if not ohlcv:
                 break
             
             all_ohlcv.extend(ohlcv)
             since = ohlcv[-1][0] + 1  # Move to next timestamp
+            failures = 0
             
             # Progress print
             current_date = datetime.fromtimestamp(ohlcv[-1][0] / 1000, timezone.utc)
             print(f"Fetched up to {current_date}")
             
-            # Rate limit handling is automatic in ccxt with enableRateLimit=True, but safety sleep
-            # time.sleep(0.1) 
-            
         except Exception as e:
-            print(f"Error fetching data: {e}")
-            time.sleep(5) # Backoff
+            failures += 1
+            _backoff(failures, e)
             
-    df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    df = pd.DataFrame(all_ohlcv, columns=OHLCV_COLUMNS)
     df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
     
     # Save to CSV
     output_dir = 'data/raw'
     os.makedirs(output_dir, exist_ok=True)
-    filename = f"{output_dir}/Delta_{symbol.replace('/', '')}_{timeframe}_{start_date}_to_now.csv"
+    filename = _output_path(symbol, timeframe, start_date, output_dir)
     df.to_csv(filename, index=False)
     print(f"Data saved to {filename}. Total rows: {len(df)}")
     
     return df
 
+def _output_path(symbol, timeframe, start_date, output_dir='data/raw'):
+    return f"{output_dir}/Delta_{symbol.replace('/', '')}_{timeframe}_{start_date}_to_now.csv"
+
+def _read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_checkpoint(path, checkpoint):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+def fetch_data_streaming(symbol='BTC/USDT', timeframe='5m', start_date='2021-01-01', exchange=None, flush_pages=10):
+    """
+    Same output file as fetch_data, but every `flush_pages` pages are appended
+    to disk and checkpointed (last timestamp + byte offset) instead of being
+    held in memory, so peak memory is one batch regardless of history length.
+    A crashed run resumes from the checkpoint; bytes written after it are
+    truncated first. Returns the number of rows in the file.
+    """
+    exchange = exchange or _make_exchange()
+    output_dir = 'data/raw'
+    os.makedirs(output_dir, exist_ok=True)
+    filename = _output_path(symbol, timeframe, start_date, output_dir)
+    checkpoint_path = filename + '.checkpoint'
+
+    checkpoint = _read_checkpoint(checkpoint_path)
+    if checkpoint and os.path.exists(filename):
+        with open(filename, 'r+b') as f:
+            f.truncate(checkpoint['offset'])
+        since = checkpoint['last_timestamp'] + 1
+        rows = checkpoint['rows']
+        print(f"Resuming {symbol} {timeframe} after {datetime.fromtimestamp(checkpoint['last_timestamp'] / 1000, timezone.utc)}...")
+    else:
+        with open(filename, 'w', newline='') as f:
+            f.write(','.join(OHLCV_COLUMNS + ['datetime']) + '\n')
+        since = int(datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+        rows = 0
+        print(f"Fetching {symbol} {timeframe} data since {start_date} (streaming)...")
+
+    end_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+    batch = []
+    pages = 0
+    failures = 0
+
+    def flush():
+        nonlocal rows
+        if not batch:
+            return
+        df = pd.DataFrame(batch, columns=OHLCV_COLUMNS)
+        df[OHLCV_COLUMNS[1:]] = df[OHLCV_COLUMNS[1:]].astype('float64')
+        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+        with open(filename, 'a', newline='') as f:
+            df.to_csv(f, header=False, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        rows += len(batch)
+        _write_checkpoint(checkpoint_path, {'last_timestamp': int(batch[-1][0]), 'offset': offset, 'rows': rows})
+        print(f"Saved up to {datetime.fromtimestamp(batch[-1][0] / 1000, timezone.utc)} ({rows} rows)")
+        batch.clear()
+
+    while since < end_ms:
+        try:
+            ohlcv = _fetch_page(exchange, symbol, timeframe, since)
+            if not ohlcv:
+                break
+        except Exception as e:
+            failures += 1
+            flush() # Checkpointed, in case this ends the run
+            _backoff(failures, e)
+            continue
+        failures = 0
+
+        batch.extend(ohlcv)
+        since = ohlcv[-1][0] + 1
+        pages += 1
+        if pages % flush_pages == 0:
+            flush()
+    flush()
+
+    # Finished: the next run starts a fresh download like fetch_data
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Data saved to {filename}. Total rows: {rows}")
+    return rows
+
+# -----------------------------------------------------------------------------
+# Incremental mode: one CSV per calendar month under data/raw/Delta_<SYMBOL>_<TF>/
+# -----------------------------------------------------------------------------
+
+def partition_dir(symbol, timeframe, data_dir='data/raw'):
+    return os.path.join(data_dir, f"Delta_{symbol.replace('/', '')}_{timeframe}")
+
+def _partition_files(out_dir):
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted(os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.endswith('.csv'))
+
+def _last_line(path, block_size=4096):
+    # Reads backwards from the end so large partitions are not scanned
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            data = f.read(end - start) + data
+            lines = data.rstrip(b'\r\n').splitlines()
+            if len(lines) > 1 or start == 0:
+                return lines[-1].decode() if lines else ''
+            end = start
+    return ''
+
+def last_stored_timestamp(out_dir):
+    """
+    Timestamp (ms) of the newest candle in the partition directory, or None.
+    """
+    for path in reversed(_partition_files(out_dir)):
+        line = _last_line(path)
+        if line and not line.startswith('timestamp'):
+            return int(float(line.split(',')[0]))
+    return None
+
+def append_partitions(out_dir, ohlcv):
+    """
+    Appends raw ccxt OHLCV rows to their month's partition file.
+    """
+    df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+    df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+    os.makedirs(out_dir, exist_ok=True)
+    for month, part in df.groupby(df['datetime'].dt.strftime('%Y-%m'), sort=True):
+        path = os.path.join(out_dir, f"{month}.csv")
+        part.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+def load_partitions(out_dir, start=None, end=None):
+    """
+    Concatenates the stored partitions (optionally only months overlapping
+    'YYYY-MM-DD' start/end) into one DataFrame.
+    """
+    files = _partition_files(out_dir)
+    if start:
+        files = [f for f in files if os.path.basename(f)[:7] >= start[:7]]
+    if end:
+        files = [f for f in files if os.path.basename(f)[:7] <= end[:7]]
+    if not files:
+        return pd.DataFrame(columns=OHLCV_COLUMNS + ['datetime'])
+    df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    return df
+
+def fetch_incremental(symbol='BTC/USDT', timeframe='5m', start_date='2021-01-01', exchange=None, data_dir='data/raw'):
+    """
+    Fetches only the candles after the last stored one and appends them to
+    per-month partitions. Each page is written as it arrives, so an
+    interrupted run resumes where it stopped. Candles that have not closed
+    yet are left for the next refresh.
+    """
+    exchange = exchange or _make_exchange()
+    out_dir = partition_dir(symbol, timeframe, data_dir)
+    tf_ms = ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+    last = last_stored_timestamp(out_dir)
+    if last is not None:
+        since = last + 1
+    else:
+        since = int(datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+    now = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+    print(f"Fetching {symbol} {timeframe} since {datetime.fromtimestamp(since / 1000, timezone.utc)} into {out_dir}...")
+    new_rows = 0
+    pages = 0
+    failures = 0
+
+    while since + tf_ms <= now:
+        try:
+            ohlcv = _fetch_page(exchange, symbol, timeframe, since)
+        except Exception as e:
+            failures += 1
+            _backoff(failures, e)
+            continue
+        failures = 0
+        pages += 1
+
+        # Drop overlap the venue may return and the still-open candle
+        ohlcv = [c for c in ohlcv if c[0] >= since and c[0] + tf_ms <= now]
+        if not ohlcv:
+            break
+
+        append_partitions(out_dir, ohlcv)
+        new_rows += len(ohlcv)
+        since = ohlcv[-1][0] + 1
+        print(f"Fetched up to {datetime.fromtimestamp(ohlcv[-1][0] / 1000, timezone.utc)}")
+
+    print(f"Added {new_rows} candles in {pages} requests.")
+    return new_rows
+
 if __name__ == "__main__":
     fetch_data()
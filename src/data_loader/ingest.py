@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = 'data/cache'
+CACHE_VERSION = 1
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def cache_path(source, cache_dir=CACHE_DIR):
+    # <stem>-<hash of the resolved path>: same-named files in different
+    # directories get their own caches
+    source = os.path.realpath(source)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    key = hashlib.sha256(source.encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{key}")
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _is_fresh(path, meta, source):
+    """
+    A cache is fresh when it was built from `source` and from the same bytes.
+    mtime/size are checked first; only if they moved is the file re-hashed
+    (a touched but unchanged file keeps its cache).
+    """
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    if meta.get('source') != os.path.realpath(source):
+        return False
+    st = os.stat(source)
+    if meta['mtime_ns'] == st.st_mtime_ns and meta['size'] == st.st_size:
+        return True
+    if meta['size'] != st.st_size or meta['sha256'] != file_hash(source):
+        return False
+    # Same content, new mtime: remember it so the next load skips hashing
+    meta['mtime_ns'] = st.st_mtime_ns
+    _write_meta(path, meta)
+    return True
+
+def parse_raw(source):
+    """
+    Parses a raw candle file into (int64 epoch-ns timestamps, {column: float64 array}).
+    Handles Exness/MT5 exports (tab separated, <DATE> <TIME> <OPEN> ...) and
+    ccxt-style CSVs (timestamp in ms, open, high, low, close, volume).
+    """
+    with open(source) as f:
+        header = f.readline()
+    sep = '\t' if '\t' in header else ','
+    df = pd.read_csv(source, sep=sep)
+
+    if '<DATE>' in df.columns:
+        # Exness data is UTC
+        ts = pd.to_datetime(df.pop('<DATE>') + ' ' + df.pop('<TIME>'))
+        df.columns = [c.strip('<>').lower() for c in df.columns]
+    elif 'timestamp' in df.columns:
+        ts = pd.to_datetime(df.pop('timestamp'), unit='ms')
+    else:
+        ts = pd.to_datetime(df.pop('datetime'))
+
+    ts = ts.values.astype('datetime64[ns]').astype(np.int64)
+    columns = {c: df[c].to_numpy(dtype=np.float64) for c in df.columns if pd.api.types.is_numeric_dtype(df[c])}
+    return ts, columns
+
+def build_cache(source, cache_dir=CACHE_DIR):
+    """
+    Converts a raw file into one .npy file per column plus a meta.json that
+    records the source mtime, size and SHA-256.
+    """
+    path = cache_path(source, cache_dir)
+    print(f"Building cache for {source}...")
+    ts, columns = parse_raw(source)
+    st = os.stat(source)
+
+    # meta.json is written last, so a half-written cache is never picked up
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'ts.npy'), ts)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), values)
+
+    meta = {
+        'version': CACHE_VERSION,
+        'source': os.path.realpath(source),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sha256': file_hash(source),
+        'rows': len(ts),
+        'columns': list(columns),
+    }
+    _write_meta(path, meta)
+    return meta
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, 'meta.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+def ensure_cache(source, cache_dir=CACHE_DIR):
+    """
+    Builds the cache for `source` if it is missing or stale.
+    Returns (cache directory, meta).
+    """
+    path = cache_path(source, cache_dir)
+    meta = _read_meta(path)
+    if not _is_fresh(path, meta, source):
+        meta = build_cache(source, cache_dir)
+    return path, meta
+
+def load_arrays(source, cache_dir=CACHE_DIR):
+    """
+    Returns {'ts': int64 epoch ns, <column>: float64} as read-only memory maps,
+    (re)building the cache first if the source file changed.
+    """
+    path, meta = ensure_cache(source, cache_dir)
+    arrays = {'ts': np.load(os.path.join(path, 'ts.npy'), mmap_mode='r')}
+    for name in meta['columns']:
+        arrays[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+    return arrays
+
+def load_candles(source, cache_dir=CACHE_DIR):
+    """
+    Cached candles as a DataFrame indexed by 'datetime' (UTC, naive). Columns
+    are the raw file's numeric columns, lower-cased without MT5 brackets
+    (open, high, low, close, tickvol, vol, spread for Exness).
+    """
+    arrays = load_arrays(source, cache_dir)
+    index = pd.DatetimeIndex(arrays.pop('ts').view('datetime64[ns]'), name='datetime')
+    return pd.DataFrame(arrays, index=index, copy=False)
@@ -0,0 +1,191 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader.ingest import CACHE_DIR, ensure_cache, load_arrays
+
+DAY_NS = 24 * 60 * 60 * 10**9
+
+# Timeframe -> bar length in minutes
+TIMEFRAMES = {'5m': 5, '15m': 15, '1h': 60, '1d': 1440}
+
+# How each column is rolled up into a coarser bar (anything else keeps the last value)
+AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'tickvol': 'sum',
+    'vol': 'sum',
+}
+
+def aggregate(ts, columns, minutes):
+    """
+    Rolls sorted int64 ns timestamps and their columns up into `minutes` bars.
+    Bars are labelled by their open time; empty buckets are not emitted.
+    """
+    bucket = ts // (minutes * 60 * 10**9)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(ts) else np.array([], dtype=np.int64)
+    lasts = np.r_[starts[1:], len(ts)].astype(np.int64) - 1
+
+    out = {'ts': bucket[starts] * (minutes * 60 * 10**9)}
+    for name, values in columns.items():
+        rule = AGGREGATION.get(name, 'last')
+        if not len(starts):
+            out[name] = values[:0]
+        elif rule == 'first':
+            out[name] = values[starts]
+        elif rule == 'max':
+            out[name] = np.fmax.reduceat(values, starts)
+        elif rule == 'min':
+            out[name] = np.fmin.reduceat(values, starts)
+        elif rule == 'sum':
+            out[name] = np.add.reduceat(values, starts)
+        else:
+            out[name] = values[lasts]
+    return out
+
+def day_offsets(ts):
+    """
+    Day numbers (days since epoch) and row offsets for sorted timestamps:
+    day i is rows offsets[i]:offsets[i + 1].
+    """
+    day = ts // DAY_NS
+    days = np.unique(day)
+    offsets = np.r_[np.searchsorted(day, days), len(ts)].astype(np.int64)
+    return days, offsets
+
+class CandleStore:
+    """
+    Pre-aggregated 5m/15m/1h/1d bars for one raw candle file, kept next to
+    its ingest cache (data/cache/<stem>-<path hash>/store/<tf>/) with per-day
+    row offsets, so a day's bars are an array slice. Rebuilt whenever the
+    ingest cache is.
+    """
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self._arrays = {}
+        self._offsets = {}
+
+    @classmethod
+    def open(cls, source, cache_dir=CACHE_DIR):
+        cache, source_meta = ensure_cache(source, cache_dir)
+        path = os.path.join(cache, 'store')
+        meta = None
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if meta is None or meta['sha256'] != source_meta['sha256'] or meta['timeframes'] != list(TIMEFRAMES):
+            meta = cls.build(source, path, source_meta, cache_dir)
+        return cls(path, meta)
+
+    @staticmethod
+    def build(source, path, source_meta, cache_dir=CACHE_DIR):
+        print(f"Building candle store for {source}...")
+        base = load_arrays(source, cache_dir)
+        ts = np.asarray(base.pop('ts'))
+        order = np.argsort(ts, kind='stable')
+        if (order == np.arange(len(ts))).all():
+            order = None
+        columns = {k: np.asarray(v) if order is None else np.asarray(v)[order] for k, v in base.items()}
+        if order is not None:
+            ts = ts[order]
+
+        shutil.rmtree(path, ignore_errors=True)
+        for tf, minutes in TIMEFRAMES.items():
+            bars = aggregate(ts, columns, minutes)
+            days, offsets = day_offsets(bars['ts'])
+            tf_path = os.path.join(path, tf)
+            os.makedirs(tf_path)
+            for name, values in bars.items():
+                np.save(os.path.join(tf_path, f'{name}.npy'), values)
+            np.save(os.path.join(tf_path, 'days.npy'), days)
+            np.save(os.path.join(tf_path, 'offsets.npy'), offsets)
+
+        meta = {'sha256': source_meta['sha256'], 'timeframes': list(TIMEFRAMES), 'columns': list(columns)}
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+    def arrays(self, tf='5m'):
+        """
+        {'ts': int64 ns, <column>: float64} memory maps for one timeframe.
+        """
+        if tf not in self._arrays:
+            tf_path = os.path.join(self.path, tf)
+            self._arrays[tf] = {name: np.load(os.path.join(tf_path, f'{name}.npy'), mmap_mode='r')
+                                for name in ['ts'] + self.meta['columns']}
+        return self._arrays[tf]
+
+    def _all_day_offsets(self, tf):
+        if tf not in self._offsets:
+            tf_path = os.path.join(self.path, tf)
+            self._offsets[tf] = (np.load(os.path.join(tf_path, 'days.npy')),
+                                 np.load(os.path.join(tf_path, 'offsets.npy')))
+        return self._offsets[tf]
+
+    def _day_range(self, tf, start, end):
+        # Indices [first, last) into days.npy of the days within start..end (inclusive dates)
+        days, _ = self._all_day_offsets(tf)
+        first = 0 if start is None else int(np.searchsorted(days, pd.Timestamp(start).value // DAY_NS))
+        last = len(days) if end is None else int(np.searchsorted(days, pd.Timestamp(end).value // DAY_NS, side='right'))
+        return first, max(first, last)
+
+    def day_offsets(self, tf='5m', start=None, end=None):
+        """
+        (days, offsets) for the days within start..end: day i is rows
+        offsets[i]:offsets[i + 1] of frame(tf, start, end).
+        """
+        days, offsets = self._all_day_offsets(tf)
+        if start is None and end is None:
+            return days, offsets
+        first, last = self._day_range(tf, start, end)
+        return days[first:last], offsets[first:last + 1] - offsets[first]
+
+    def row_range(self, tf='5m', start=None, end=None):
+        """
+        (first, last) rows of the timeframe covering dates start..end
+        (inclusive, either may be None).
+        """
+        _, offsets = self._all_day_offsets(tf)
+        first, last = self._day_range(tf, start, end)
+        return int(offsets[first]), int(offsets[last])
+
+    def dates(self, tf='5m'):
+        days, _ = self.day_offsets(tf)
+        return pd.to_datetime(days * DAY_NS).date
+
+    def frame(self, tf='5m', start=None, end=None):
+        """
+        Timeframe as a DataFrame indexed by 'datetime' (no copy), optionally
+        only dates start..end. The range is a slice of the memory maps, so
+        only its rows are read from disk.
+        """
+        lo, hi = self.row_range(tf, start, end) if start is not None or end is not None else (None, None)
+        arrays = {name: values[lo:hi] for name, values in self.arrays(tf).items()}
+        index = pd.DatetimeIndex(arrays.pop('ts').view('datetime64[ns]'), name='datetime')
+        return pd.DataFrame(arrays, index=index, copy=False)
+
+    def day_rows(self, date, tf='5m'):
+        """
+        (start, end) rows of `date` in the timeframe, or None if it has no bars.
+        """
+        days, offsets = self.day_offsets(tf)
+        day = pd.Timestamp(date).value // DAY_NS
+        i = np.searchsorted(days, day)
+        if i == len(days) or days[i] != day:
+            return None
+        return int(offsets[i]), int(offsets[i + 1])
+
+    def day(self, date, tf='5m'):
+        rows = self.day_rows(date, tf)
+        if rows is None:
+            return self.frame(tf).iloc[:0]
+        return self.frame(tf).iloc[rows[0]:rows[1]]
@@ -0,0 +1,77 @@
+import numpy as np
+
+class BarBuilder:
+    """
+    Builds fixed-interval OHLC bars from ticks. The bar in progress is kept
+    in plain attributes; when a tick opens the next bar, the finished one is
+    written into preallocated NumPy ring buffers holding the last `capacity`
+    bars. Nothing is allocated per tick and memory stays fixed however long
+    it runs.
+
+    Bars are labelled by their open time (epoch ms), like the candle store.
+    """
+    def __init__(self, minutes=5, capacity=1024):
+        self.interval_ms = minutes * 60_000
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.count = 0 # bars closed so far (the ring holds the last `capacity`)
+
+        # Bar in progress
+        self.start = -1
+        self.o = self.h = self.l = self.c = 0.0
+
+    def update(self, ts_ms, price):
+        """
+        Adds a tick. Returns True when it closed the previous bar (readable
+        with last()); ticks older than the current bar are ignored.
+        """
+        start = ts_ms - ts_ms % self.interval_ms
+        if start == self.start:
+            if price > self.h:
+                self.h = price
+            elif price < self.l:
+                self.l = price
+            self.c = price
+            return False
+        if start < self.start:
+            return False
+
+        closed = self.start >= 0
+        if closed:
+            i = self.count % self.capacity
+            self.ts[i] = self.start
+            self.open[i] = self.o
+            self.high[i] = self.h
+            self.low[i] = self.l
+            self.close[i] = self.c
+            self.count += 1
+        self.start = start
+        self.o = self.h = self.l = self.c = price
+        return closed
+
+    def last(self):
+        """
+        The most recently closed bar as (ts_ms, open, high, low, close).
+        """
+        i = (self.count - 1) % self.capacity
+        return int(self.ts[i]), float(self.open[i]), float(self.high[i]), float(self.low[i]), float(self.close[i])
+
+    def current(self):
+        # The bar in progress, or None before the first tick
+        if self.start < 0:
+            return None
+        return self.start, self.o, self.h, self.l, self.c
+
+    def history(self, n=None):
+        """
+        Up to the last `n` closed bars, oldest first, as a dict of arrays
+        (copies, safe to keep).
+        """
+        k = min(self.count, self.capacity) if n is None else min(n, self.count, self.capacity)
+        idx = (np.arange(self.count - k, self.count)) % self.capacity
+        return {'ts': self.ts[idx], 'open': self.open[idx], 'high': self.high[idx],
+                'low': self.low[idx], 'close': self.close[idx]}
@@ -1,34 +1,92 @@
 import time
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import logging
-import os
-from dotenv import load_dotenv
 
-# Setup Logging
-logging.basicConfig(
-    filename='logs/trading_bot.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from src.live_trade.bars import BarBuilder
+from src.live_trade.log import event
+from src.live_trade.metrics import METRICS
+from src.live_trade.orders import OrderUnresolved, new_client_order_id
+from src.strategy.session_breakout import DAY_MS, SessionBreakout
+
+# Handlers are set up by the entry point (log.setup_logging in main.py)
+log = logging.getLogger(__name__)
+
+# Strategy parameters; any of them can be overridden per bot through its config
+DEFAULT_PARAMS = {
+    'buffer_pct': 0.0005,       # Breakout buffer beyond the session range
+    'sl_pct': 0.0030,
+    'tp_pct': 0.0070,
+    'tsl_activate_pct': 0.0040, # Move SL once price is this far in favour...
+    'tsl_trail_pct': 0.0020,    # ...to this far on the other side of entry
+}
+
+# Sessions are UTC windows (strategy/session_breakout.py), as in Backtester
+TICK_WINDOW_SPAN = 5 * 60_000 - 1 # ms
+# How often a failed range backfill is tried again
+RANGE_RETRY_MS = 60_000
+# Order state kept on the position while an order is out; never journaled
+ORDER_KEYS = ('pending', 'closing', 'unresolved')
+
+# Built once; IST has no DST, so a fixed offset is exact
+IST = timezone(timedelta(hours=5, minutes=30), 'IST')
+
+def wall_clock():
+    return datetime.now(IST)
 
 class TradingBot:
-    def __init__(self, exchange_adapter, config):
+    def __init__(self, exchange_adapter, config, metrics=None, orders=None, clock=None, journal=None):
         self.exchange = exchange_adapter
+        # Optional StateJournal (journal.py): position state survives restarts
+        self.journal = journal
+        # Returns the current time (tz-aware, IST); replay.py swaps in a
+        # simulated clock
+        self.clock = clock or wall_clock
+        # Optional OrderPipeline (orders.py): orders are queued instead of
+        # sent inline, and fills come back through callbacks
+        self.orders = orders
+        self.metrics = metrics or METRICS
         self.config = config
-        
-        # Strategy State
-        self.session_high = None
-        self.session_low = None
-        self.daily_trade_taken = False
+        self.params = {k: config.get(k, v) for k, v in DEFAULT_PARAMS.items()}
+        # Tags log lines when several bots share a process (see runner.py)
+        self.name = config.get('name', config['symbol'])
+        # Bar mode (default): ticks are built into bars, and the range, entries
+        # and time exit run on each closed bar as in Backtester, while SL/TP/TSL
+        # are also checked on every tick (tick_stops). bar_minutes=0 feeds every
+        # tick to the strategy as a bar with high == low == close instead.
+        self.bar_minutes = config.get('bar_minutes', 5)
+        self.tick_stops = config.get('tick_stops', True)
+        # Once the range window has closed, the range is rebuilt from the
+        # venue's 1m candles: prices sampled every interval miss its extremes
+        self.range_backfill = config.get('range_backfill', True) and hasattr(exchange_adapter, 'fetch_ohlcv')
+        # SL/TP are re-anchored on the entry's fill price when the order
+        # reports one; replay.py turns this off to compare against Backtester
+        self.rebase_on_fill = config.get('rebase_on_fill', True)
+        self.bars = BarBuilder(self.bar_minutes) if self.bar_minutes else None
+        # Strategy state lives in the same state machine Backtester runs
+        self.strategy = SessionBreakout(config.get('strategy_version', 'v1'), **self.params)
+        if self.bars is None:
+            # Windows name Backtester's 5m bars by open time; ticks get the
+            # whole of the last bar
+            span = TICK_WINDOW_SPAN
+            self.strategy.range_end += span
+            self.strategy.entry_limit += span
+            self.strategy.exit_time += span
+        # Range bars span their whole interval
+        self.range_close = self.strategy.range_end + (self.bars.interval_ms if self.bars is not None else 1)
+        self._range_day = None # day the range was last backfilled for
+        self._range_retry = 0 # earliest ts_ms of the next backfill attempt
         self.current_date = None
         
         # Position State
-        self.active_position = None # { 'symbol': 'BTC/USDT', 'side': 'buy', 'entry': 100, 'sl': 99, 'tp': 102 }
+        self.active_position = None # { 'side': 'buy', 'entry': 100, 'sl': 99, 'tp': 102, 'trailing_active': False }
+
+        # Time spent in order calls during the current tick (kept out of 'decision')
+        self._order_time = 0.0
 
     def run(self):
-        logging.info("Starting Trading Bot...")
+        log.info("Starting Trading Bot...")
         print("Bot Started. Waiting for data...")
+        self.warm_start()
         
         while True:
             try:
@@ -38,127 +96,393 @@ class TradingBot:
                 print("Stopping Bot...")
                 break
             except Exception as e:
-                logging.error(f"Error in main loop: {e}")
+                log.error("Error in main loop: %s", e)
                 time.sleep(10)
 
+    async def run_async(self, feed):
+        """
+        Event-driven mode: evaluates every trade/tick from `feed` (an async
+        iterator of (timestamp_ms, price), see feeds.py) as it arrives instead
+        of sampling one ticker per interval.
+        """
+        log.info("Starting Trading Bot (streaming %s)...", self.config['symbol'])
+        print("Bot Started. Streaming trades...")
+        self.warm_start()
+        
+        if self.orders is not None:
+            self.orders.start()
+        # Paper adapters fill from the streamed price instead of a REST ticker
+        on_quote = getattr(self.exchange, 'on_quote', None)
+        symbol = self.config['symbol']
+        try:
+            async for ts_ms, price in feed:
+                if on_quote is not None:
+                    on_quote(symbol, price, timestamp=ts_ms)
+                try:
+                    self.on_price(price, datetime.fromtimestamp(ts_ms / 1000, IST))
+                except Exception as e:
+                    log.error("[%s] Error handling tick: %s", self.name, e)
+        finally:
+            if self.orders is not None:
+                await self.orders.stop()
+
+    def session_candles(self, now=None):
+        """
+        Today's 1m candles over the session range, in one fetch_ohlcv call
+        (empty before the range has started).
+        """
+        now = now or self.clock()
+        now_ms = int(now.timestamp() * 1000)
+        start_ms = now_ms - now_ms % DAY_MS + self.strategy.range_start
+        if now_ms < start_ms:
+            return []
+        minutes = (self.strategy.range_end - self.strategy.range_start) // 60_000 + max(self.bar_minutes, 1)
+        return self.exchange.fetch_ohlcv(self.config['symbol'], '1m', since=start_ms, limit=minutes)
+
+    def warm_start(self, candles=None):
+        """
+        Rebuilds state after a restart: the open position and today's trade
+        flag from the journal, and today's session high/low from 1m candles
+        (fetched with session_candles() unless given).
+        """
+        strategy = self.strategy
+        now_ms = int(self.clock().timestamp() * 1000)
+        strategy.new_day(now_ms // DAY_MS)
+        self.current_date = self._date(now_ms)
+
+        state = self.journal.last() if self.journal is not None else None
+        if state:
+            # An open position carries over midnight; the daily flag does not
+            pos = self.active_position = state.get('active_position')
+            traded = state.get('date') == self.current_date and state.get('daily_trade_taken', False)
+            if pos is not None:
+                pos['trailing_active'] = pos.get('trailing_active', pos.pop('trailing_updated', False))
+                if state.get('date') != self.current_date or now_ms % DAY_MS > strategy.exit_time:
+                    # Its trade window is over: closed at market on the first price
+                    pos['exit_due'] = 'TimeExit'
+                    event(log, 'exit_overdue', "[%s] Restored position is past its exit time: %s",
+                          self.name, dict(pos), level=logging.WARNING, bot=self.name, date=state.get('date'))
+                else:
+                    # Managed even if the range below can't be rebuilt
+                    strategy.restore(pos['side'], pos['entry'], pos['sl'], pos['tp'], pos['trailing_active'], traded,
+                                     now_ms, pos['entry'])
+            strategy.traded = traded
+
+        if candles is None:
+            try:
+                candles = self.session_candles()
+            except Exception as e:
+                # Retried by _sync_range() once the range window has closed
+                log.error("[%s] Session backfill failed: %s", self.name, e)
+                candles = []
+        if self._fold_range(candles) and now_ms % DAY_MS >= self.range_close:
+            self._range_day = strategy.day
+
+        position = self._position_fields()
+        event(log, 'warm_start', "[%s] Warm start: session %s-%s, traded today: %s, position: %s",
+              self.name, self.session_low, self.session_high, self.daily_trade_taken, position,
+              bot=self.name, session_low=self.session_low, session_high=self.session_high,
+              daily_trade_taken=self.daily_trade_taken, position=position)
+
+    def _fold_range(self, candles, replace=False):
+        # Folds today's range-window candles into the strategy; returns how many there were
+        strategy = self.strategy
+        candles = [c for c in candles if strategy.range_start <= c[0] - strategy.day * DAY_MS < self.range_close]
+        if candles and replace:
+            strategy.high, strategy.low = float('-inf'), float('inf')
+        for candle in candles:
+            strategy.add_range(candle[2], candle[3])
+        return len(candles)
+
+    def _sync_range(self, ts_ms):
+        # Rebuilds today's range from 1m candles, retried every RANGE_RETRY_MS until it succeeds
+        self._range_retry = ts_ms + RANGE_RETRY_MS
+        try:
+            candles = self.session_candles()
+        except Exception as e:
+            log.error("[%s] Range backfill failed: %s", self.name, e)
+            return
+        if self._fold_range(candles, replace=True):
+            self._range_day = self.strategy.day
+            event(log, 'range', "[%s] Session range from 1m candles: %s-%s", self.name,
+                  self.session_low, self.session_high,
+                  bot=self.name, session_low=self.session_low, session_high=self.session_high)
+
+    @property
+    def session_high(self):
+        return self.strategy.high if self.strategy.ranged else None
+
+    @property
+    def session_low(self):
+        return self.strategy.low if self.strategy.ranged else None
+
+    @property
+    def daily_trade_taken(self):
+        return self.strategy.traded
+
+    @staticmethod
+    def _date(ts_ms):
+        return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).date().isoformat()
+
+    def _save_state(self):
+        if self.journal is None:
+            return
+        pos = self.active_position
+        if pos is not None:
+            pos = {k: v for k, v in pos.items() if k not in ORDER_KEYS}
+        self.journal.append({
+            'ts': int(self.clock().timestamp() * 1000),
+            'date': self.current_date,
+            'daily_trade_taken': self.daily_trade_taken,
+            'active_position': pos,
+        })
+
     def tick(self):
         # 1. Get Time (IST)
-        import pytz
-        ist = pytz.timezone('Asia/Kolkata')
-        now = datetime.now(ist) 
+        now = self.clock()
         
         symbol = self.config['symbol']
+        t0 = time.perf_counter()
         ticker = self.exchange.fetch_ticker(symbol)
-        current_price = ticker['last']
-        
-        # Reset Logic (New Day)
-        today_str = now.strftime('%Y-%m-%d')
-        if self.current_date != today_str:
-            self.current_date = today_str
-            self.session_high = None
-            self.session_low = None
-            self.daily_trade_taken = False
-            logging.info(f"New Day: {today_str}. Resetting state.")
-
-        # 2. Session Logic (08:15 - 09:15)
-        # Assuming simple time check (Hours 8, Minute 15 etc)
-        # Note: server time vs IST. using datetime.now() implies local server time. 
-        # SHOULD use pytz for robust IST. Simplified here.
-        
-        curr_hour = now.hour
-        curr_min = now.minute
-        time_val = curr_hour * 100 + curr_min
-        
-        if 815 <= time_val <= 915:
-            # During Session: Update High/Low
-            if self.session_high is None:
-                self.session_high = current_price
-                self.session_low = current_price
-            else:
-                self.session_high = max(self.session_high, current_price)
-                self.session_low = min(self.session_low, current_price)
+        self.metrics.observe('ticker_fetch', time.perf_counter() - t0)
+        self.on_price(ticker['last'], now)
+
+    def on_price(self, current_price, now):
+        # Times the strategy decision for one tick, excluding order round trips
+        t0 = time.perf_counter()
+        self._order_time = 0.0
+        self.metrics.incr('ticks')
+        try:
+            self._on_price(current_price, now)
+        finally:
+            self.metrics.observe('decision', time.perf_counter() - t0 - self._order_time)
+
+    def _on_price(self, current_price, now):
+        pos = self.active_position
+        if pos is not None and pos.get('unresolved'):
+            # Same client order ID, so it is settled where it was sent first
+            self._resend(pos)
+            pos = self.active_position
+        if pos is not None and pos.get('exit_due') and not (pos.get('pending') or pos.get('closing')):
+            # A failed, deferred or overdue exit goes out again at this price
+            self._exit(pos.pop('exit_due'), current_price)
+        ts_ms = int(now.timestamp() * 1000)
+        strategy = self.strategy
+        day, tod = divmod(ts_ms, DAY_MS)
+        if (self.range_backfill and self._range_day != day and strategy.day == day
+                and self.range_close <= tod <= strategy.entry_limit and ts_ms >= self._range_retry):
+            self._sync_range(ts_ms)
+        if self.bars is None:
+            self._step(ts_ms, current_price, current_price, current_price)
             return
+        if self.bars.update(ts_ms, current_price):
+            ts, o, h, l, c = self.bars.last()
+            self._step(ts, h, l, c)
+        if self.tick_stops and strategy.side is not None:
+            trailing = strategy.trailing
+            self._act(strategy.check_stops(ts_ms, current_price), trailing)
 
-        # 3. Post-Session: Look for Entries
-        if self.session_high and not self.daily_trade_taken and not self.active_position:
-            # Check Buy
-            buy_trigger = self.session_high * (1 + 0.0005)
-            if current_price > buy_trigger:
-                self.execute_entry('buy', current_price)
-                return
+    def _step(self, ts, h, l, c):
+        # One strategy update (closed bar or tick), then carry out its decision
+        strategy = self.strategy
+        day, trailing = strategy.day, strategy.trailing
+        decision = strategy.update(ts, h, l, c, tick=self.bars is None)
+        if strategy.day != day:
+            self.current_date = self._date(ts)
+            event(log, 'new_day', "[%s] New Day: %s. Resetting state.", self.name, self.current_date,
+                  bot=self.name, date=self.current_date)
+        self._act(decision, trailing)
 
-            # Check Sell
-            sell_trigger = self.session_low * (1 - 0.0005)
-            if current_price < sell_trigger:
-                self.execute_entry('sell', current_price)
-                return
+    def _act(self, decision, trailing):
+        # `trailing`: whether the stop was trailing before the decision
+        strategy = self.strategy
+        pos = self.active_position
+        if pos is None:
+            if decision is not None and decision[0] == 'entry':
+                self.execute_entry(decision[1], decision[2])
+            return
+        if strategy.trailing and not trailing:
+            pos['sl'] = strategy.sl
+            pos['trailing_active'] = True
+            self._save_state()
+            event(log, 'trailing', "[%s] Trailing SL Updated to %s", self.name, strategy.sl,
+                  bot=self.name, sl=strategy.sl)
 
-        # 4. Manage Open Position
-        if self.active_position:
-            self.manage_position(current_price)
+        if decision is not None and decision[0] == 'exit':
+            if pos.get('pending') or pos.get('closing'):
+                # Sent once the order in flight has come back
+                pos['exit_due'] = decision[1]
+            else:
+                self._exit(decision[1], decision[2])
 
     def execute_entry(self, side, price):
-        logging.info(f"Signal Detected: {side.upper()} @ {price}")
-        
-        # Calculate Risk Config
-        sl_pct = 0.0030
-        tp_pct = 0.0070
+        signal_at = time.perf_counter()
+        self.metrics.incr('signals')
+        event(log, 'signal', "[%s] Signal Detected: %s @ %s", self.name, side.upper(), price,
+              bot=self.name, side=side, price=price)
         
-        if side == 'buy':
-            sl = price * (1 - sl_pct)
-            tp = price * (1 + tp_pct)
-        else:
-            sl = price * (1 + sl_pct)
-            tp = price * (1 - tp_pct)
-            
+        # Risk levels as set by the strategy on entry
+        position = {
+            'side': side,
+            'entry': price, # Moved to the fill price by _rebase()
+            'sl': self.strategy.sl,
+            'tp': self.strategy.tp,
+            'trailing_active': False
+        }
+        if self.orders is not None:
+            # Held as pending (not managed) until the fill comes back
+            position['pending'] = True
+            self.active_position = position
+            self.orders.submit(self.config['symbol'], side, self.config['quantity'], signal_at=signal_at,
+                               on_fill=lambda order: self._on_entry_fill(position, order),
+                               on_fail=lambda error: self._on_entry_failed(position))
+            return
+
         # Place Order (Live)
-        order = self.exchange.create_order(self.config['symbol'], 'market', side, self.config['quantity'])
+        cid = new_client_order_id()
+        try:
+            order = self._submit(side, signal_at, cid)
+        except OrderUnresolved as e:
+            position['pending'] = True
+            self.active_position = position
+            self._unresolved(position, (cid, side, None), e)
+            return
         if order:
-            self.active_position = {
-                'side': side,
-                'entry': price, # Use fill price ideally
-                'sl': sl,
-                'tp': tp,
-                'trailing_active': False
-            }
-            self.daily_trade_taken = True
-            logging.info(f"Trade Executed: {self.active_position}")
-            print(f"Entered {side.upper()} Trade.")
-
-    def manage_position(self, current_price):
+            self.active_position = position
+            self._rebase(position, order)
+            self._save_state()
+            self._log_entry(position)
+        else:
+            self.strategy.cancel_entry()
+
+    def _on_entry_fill(self, position, order):
+        position.pop('pending', None)
+        self._rebase(position, order)
+        self._save_state()
+        self._log_entry(position)
+
+    def _rebase(self, position, order):
+        fill = order.get('average') if isinstance(order, dict) else None
+        if not self.rebase_on_fill or not fill or self.active_position is not position:
+            return
+        strategy = self.strategy
+        strategy.rebase(fill)
+        if not strategy.trailing:
+            position.update(entry=strategy.entry, sl=strategy.sl, tp=strategy.tp)
+
+    def _on_entry_failed(self, position):
+        # Same as a failed inline order: no position, entry still allowed
+        if self.active_position is position:
+            self.active_position = None
+            self.strategy.cancel_entry()
+
+    def _exit(self, reason, price):
         pos = self.active_position
-        side = pos['side']
+        signal_at = time.perf_counter()
+        event(log, 'exit_signal', "[%s] Exiting Trade: %s Hit. Price: %s", self.name, reason, price,
+              bot=self.name, reason=reason, price=price, side=pos['side'], entry=pos['entry'])
         
-        # Check SL/TP
-        hit_sl = (side == 'buy' and current_price <= pos['sl']) or (side == 'sell' and current_price >= pos['sl'])
-        hit_tp = (side == 'buy' and current_price >= pos['tp']) or (side == 'sell' and current_price <= pos['tp'])
+        # Close Order
+        close_side = 'sell' if pos['side'] == 'buy' else 'buy'
+        if self.orders is not None:
+            pos['closing'] = True
+            self.orders.submit(self.config['symbol'], close_side, self.config['quantity'], signal_at=signal_at,
+                               on_fill=lambda order: self._on_exit_fill(pos, reason),
+                               on_fail=lambda error: self._on_exit_failed(pos, reason))
+            return
+        cid = new_client_order_id()
+        try:
+            order = self._submit(close_side, signal_at, cid)
+        except OrderUnresolved as e:
+            pos['closing'] = True
+            self._unresolved(pos, (cid, close_side, reason), e)
+            return
+        if not order:
+            self._on_exit_failed(pos, reason)
+            return
         
-        if hit_sl or hit_tp:
-            reason = 'TP' if hit_tp else 'SL'
-            logging.info(f"Exiting Trade: {reason} Hit. Price: {current_price}")
-            
-            # Close Order
-            close_side = 'sell' if side == 'buy' else 'buy'
-            self.exchange.create_order(self.config['symbol'], 'market', close_side, self.config['quantity'])
-            
-            self.active_position = None
-            print(f"Trade Closed ({reason})")
+        self.active_position = None
+        self._save_state()
+        self._log_exit(pos, reason)
+
+    def _unresolved(self, pos, order, error):
+        # The order may exist: held (pending/closing) until a resend under the
+        # same ID settles it, instead of risking a second order
+        pos['unresolved'] = order
+        event(log, 'order_unresolved', "[%s] Order %s unresolved, retrying on the next price: %s",
+              self.name, order[0], error, level=logging.WARNING, bot=self.name, client_order_id=order[0],
+              side=order[1], error=str(error))
+
+    def _resend(self, pos):
+        cid, side, reason = pos['unresolved']
+        try:
+            order = self._submit(side, time.perf_counter(), cid)
+        except OrderUnresolved:
             return
-            
-        # Trailing Logic
-        # Update SL if moved 0.40% in favor
-        if side == 'buy':
-             if current_price >= pos['entry'] * 1.0040 and not pos.get('trailing_updated'):
-                 new_sl = pos['entry'] * 0.9980 # Entry - 0.20%
-                 pos['sl'] = new_sl
-                 pos['trailing_updated'] = True
-                 logging.info(f"Trailing SL Updated to {new_sl}")
-        elif side == 'sell':
-             if current_price <= pos['entry'] * 0.9960 and not pos.get('trailing_updated'):
-                 new_sl = pos['entry'] * 1.0020 # Entry + 0.20%
-                 pos['sl'] = new_sl
-                 pos['trailing_updated'] = True
-                 logging.info(f"Trailing SL Updated to {new_sl}")
+        del pos['unresolved']
+        if reason is None:
+            if order:
+                self._on_entry_fill(pos, order)
+            else:
+                self._on_entry_failed(pos)
+        elif order:
+            self._on_exit_fill(pos, reason)
+        else:
+            self._on_exit_failed(pos, reason)
+
+    def _on_exit_fill(self, pos, reason):
+        if self.active_position is pos:
+            self.active_position = None
+            self._save_state()
+        self._log_exit(pos, reason)
+
+    def _on_exit_failed(self, pos, reason):
+        # Keep the position; the exit is sent again on the next price
+        pos['closing'] = False
+        pos['exit_due'] = reason
+        position = self._position_fields()
+        event(log, 'exit_failed', "[%s] Exit order failed, position still open: %s", self.name, position,
+              level=logging.ERROR, bot=self.name, reason=reason, position=position)
+
+    def _position_fields(self):
+        # Copied: records, message arguments included, are formatted later on
+        # the log writer thread
+        pos = self.active_position
+        return None if pos is None else {k: v for k, v in pos.items() if k not in ORDER_KEYS}
+
+    def _log_entry(self, position):
+        event(log, 'entry', "[%s] Entered %s Trade: %s", self.name, position['side'].upper(), dict(position),
+              bot=self.name, symbol=self.config['symbol'], side=position['side'], entry=position['entry'],
+              sl=position['sl'], tp=position['tp'])
+
+    def _log_exit(self, pos, reason):
+        event(log, 'exit', "[%s] Trade Closed (%s)", self.name, reason,
+              bot=self.name, symbol=self.config['symbol'], side=pos['side'], entry=pos['entry'], reason=reason)
+
+    def _submit(self, side, signal_at, cid):
+        # order_submit: signal -> request sent; order_ack: exchange round trip.
+        # Sent under client order ID `cid` where the adapter supports it;
+        # returns the order or None, and lets OrderUnresolved through
+        t0 = time.perf_counter()
+        self.metrics.observe('order_submit', t0 - signal_at)
+        symbol, qty = self.config['symbol'], self.config['quantity']
+        submit_order = getattr(self.exchange, 'submit_order', None)
+        try:
+            if submit_order is None:
+                order = self.exchange.create_order(symbol, 'market', side, qty)
+            else:
+                order = submit_order(symbol, 'market', side, qty, client_order_id=cid)
+        except OrderUnresolved:
+            raise
+        except Exception as e:
+            log.error("[%s] Order Failed: %s", self.name, e)
+            order = None
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._order_time += elapsed
+            self.metrics.observe('order_ack', elapsed)
+        self.metrics.incr('orders' if order else 'order_errors')
+        return order
 
 # Abstract Exchange Adapter for mocking/switching
 class ExchangeInterface:
@@ -1,54 +1,365 @@
-import ccxt
+import json
 import os
 import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+from src.utils.rate_limit import MARKET_DATA, ORDERS, scheduler_for
+
+log = logging.getLogger(__name__)
+
+# ccxt is imported on first use: it dominates start-up time otherwise
+
+MARKETS_CACHE_DIR = 'data/cache'
+MARKETS_MAX_AGE = 24 * 3600 # seconds before cached markets are refetched
+
+_session = None
+_ticker_caches = {}
+_registry_lock = threading.Lock()
+
+def shared_session(pool_size=16):
+    """
+    One keep-alive requests.Session for every adapter in the process
+    (passed to ccxt as its 'session'), so REST calls reuse open connections.
+    """
+    global _session
+    with _registry_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+class _Call:
+    # One in-flight ticker request that other callers can wait on
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class TickerCache:
+    """
+    Serves tickers from memory for `ttl` seconds after they were fetched.
+    When a quote is stale, concurrent callers for that symbol share one
+    request: the first one fetches, the rest wait for its result.
+    """
+    def __init__(self, fetch, ttl=1.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {} # symbol -> (ticker, monotonic fetch time)
+        self._inflight = {} # symbol -> _Call
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        entry = self._entries.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+
+        with self._lock:
+            call = self._inflight.get(symbol)
+            leader = call is None
+            if leader:
+                call = self._inflight[symbol] = _Call()
+        if not leader:
+            self.hits += 1
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        self.misses += 1
+        try:
+            call.result = self.fetch(symbol)
+            self._entries[symbol] = (call.result, time.monotonic())
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[symbol]
+            call.done.set()
+
+def shared_ticker_cache(key, fetch, ttl=1.0):
+    """
+    The TickerCache for one venue (`key`), created with `fetch` on first use
+    and shared by every adapter for that venue afterwards.
+    """
+    with _registry_lock:
+        cache = _ticker_caches.get(key)
+        if cache is None:
+            cache = _ticker_caches[key] = TickerCache(fetch, ttl)
+        return cache
+
+def load_markets_cached(exchange, venue, cache_dir=MARKETS_CACHE_DIR, max_age=MARKETS_MAX_AGE, scheduler=None):
+    """
+    Loads markets (symbols, precision, limits) from <cache_dir>/markets_<venue>.json
+    when it is younger than `max_age` seconds, otherwise from the exchange,
+    rewriting the file. Saves the network round trips ccxt would otherwise
+    make before the first order.
+    """
+    path = os.path.join(cache_dir, f'markets_{venue}.json')
+    try:
+        if time.time() - os.path.getmtime(path) < max_age:
+            with open(path) as f:
+                cached = json.load(f)
+            exchange.set_markets(cached['markets'], cached.get('currencies'))
+            return exchange.markets
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if scheduler is not None:
+        markets = scheduler.call('load_markets', exchange.load_markets, retry_errors=True)
+    else:
+        markets = exchange.load_markets()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'markets': exchange.markets, 'currencies': exchange.currencies}, f)
+    os.replace(tmp, path)
+    return markets
 
 class BinanceAdapter:
-    def __init__(self, api_key=None, secret=None, sand_box=False):
+    def __init__(self, api_key=None, secret=None, sand_box=False, ticker_ttl=1.0, markets_max_age=MARKETS_MAX_AGE):
+        import ccxt
         self.exchange = ccxt.binance({
             'apiKey': api_key,
             'secret': secret,
-            'enableRateLimit': True,
+            # Paced by the venue's RequestScheduler instead
+            'enableRateLimit': False,
+            'session': shared_session(),
         })
         if sand_box:
             self.exchange.set_sandbox_mode(True)
+        # Quotes are public, so every Binance adapter shares one cache
+        self.venue = 'binance-sandbox' if sand_box else 'binance'
+        # One weight budget per venue, shared with any history fetcher running in-process
+        self.scheduler = scheduler_for(self.venue)
+        self.tickers = shared_ticker_cache(self.venue, self._fetch_ticker, ticker_ttl)
+        self.markets_max_age = markets_max_age
+
+    def load_markets(self):
+        # Call once at start-up so the first order does not pay for it
+        return load_markets_cached(self.exchange, self.venue, max_age=self.markets_max_age, scheduler=self.scheduler)
+
+    def _fetch_ticker(self, symbol):
+        return self.scheduler.call('fetch_ticker', self.exchange.fetch_ticker, symbol, retries=1)
             
     def fetch_ticker(self, symbol):
-        return self.exchange.fetch_ticker(symbol)
+        return self.tickers.get(symbol)
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        return self.scheduler.call('fetch_ohlcv', self.exchange.fetch_ohlcv, symbol, timeframe, since, limit,
+                                   priority=MARKET_DATA, retry_errors=True)
         
     def create_order(self, symbol, type, side, amount):
         try:
-            return self.exchange.create_order(symbol, type, side, amount)
+            return self.scheduler.call('create_order', self.exchange.create_order, symbol, type, side, amount,
+                                       priority=ORDERS)
         except Exception as e:
-            logging.error(f"Order Failed: {e}")
+            log.error("Order Failed: %s", e)
+            return None
+
+    def submit_order(self, symbol, type, side, amount, client_order_id):
+        # Raises on failure; Binance rejects a repeated newClientOrderId. Other
+        # retries are left to OrderPipeline, which looks the order up first.
+        return self.scheduler.call('create_order', self.exchange.create_order, symbol, type, side, amount,
+                                   params={'newClientOrderId': client_order_id}, priority=ORDERS, retries=1)
+
+    def fetch_order_by_client_id(self, symbol, client_order_id):
+        import ccxt
+        try:
+            return self.scheduler.call('fetch_order', self.exchange.fetch_order, None, symbol,
+                                       params={'origClientOrderId': client_order_id}, priority=ORDERS)
+        except ccxt.OrderNotFound:
             return None
 
 class PaperTradingAdapter:
     """
-    Simulates an exchange. Stores orders in memory.
-    Uses real market data for price, but executes locally.
+    Simulates an exchange locally.
+    Fills from the most recent cached quote (fed by on_quote() from the
+    streaming feed, or by fetch_ticker() in polling mode), so a fill costs no
+    network request. Market orders pay half the modelled spread when the
+    quote has no bid/ask, plus slippage. With `latency_ms`, an order is
+    returned open and fills at the first quote stamped `latency_ms` after
+    the one it was sent on, so latency runs on the quotes' clock (live or
+    replayed) instead of blocking the caller. Positions and PnL are updated
+    per fill; the last `journal_size` fills are kept as compact tuples.
+    Safe to share between threads (OrderPipeline workers).
     """
-    def __init__(self, real_exchange_adapter):
-        self.real_exchange = real_exchange_adapter # Use for price
-        self.orders = []
-        
+    # Journal rows: (timestamp_ms, order id, symbol, side, amount, price, fee)
+    JOURNAL_FIELDS = ('timestamp', 'id', 'symbol', 'side', 'amount', 'price', 'fee')
+
+    def __init__(self, real_exchange_adapter, spread_bps=1.0, slippage_bps=0.5, latency_ms=0.0,
+                 fee_bps=0.0, journal_size=10_000):
+        self.real_exchange = real_exchange_adapter # Used for prices only when no quote is cached
+        self.spread_bps = spread_bps
+        self.slippage_bps = slippage_bps
+        self.latency_ms = latency_ms
+        self.fee_bps = fee_bps
+        self.quotes = {} # symbol -> (bid, ask, timestamp_ms)
+        self.positions = {} # symbol -> {'qty', 'avg_price', 'realized', 'fees'}
+        self.journal = deque(maxlen=journal_size)
+        self.by_client_id = OrderedDict()
+        self._journal_size = journal_size
+        self._next_id = 0
+        self._pending = {} # symbol -> deque of (due timestamp_ms, open order)
+        self._lock = threading.Lock()
+
+    def on_quote(self, symbol, bid, ask=None, timestamp=None):
+        """
+        Caches the latest quote and fills orders that have become due. With
+        only a trade price, bid/ask are spread_bps around it.
+        """
+        if ask is None:
+            half = bid * self.spread_bps / 20000
+            bid, ask = bid - half, bid + half
+        timestamp = timestamp or int(time.time() * 1000)
+        self.quotes[symbol] = (bid, ask, timestamp)
+        if self._pending.get(symbol):
+            self._fill_due(symbol, bid, ask, timestamp)
+
     def fetch_ticker(self, symbol):
-        # Pass through to real data
-        return self.real_exchange.fetch_ticker(symbol)
-        
+        # Pass through to real data, keeping its quote for fills
+        ticker = self.real_exchange.fetch_ticker(symbol)
+        if ticker.get('bid') and ticker.get('ask'):
+            self.on_quote(symbol, ticker['bid'], ticker['ask'], ticker.get('timestamp'))
+        else:
+            self.on_quote(symbol, ticker['last'], timestamp=ticker.get('timestamp'))
+        return ticker
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        return self.real_exchange.fetch_ohlcv(symbol, timeframe, since, limit)
+
+    def submit_order(self, symbol, type, side, amount, client_order_id):
+        # Same client order ID twice is one order, as on the exchange
+        with self._lock:
+            order = self.by_client_id.get(client_order_id)
+        if order is not None:
+            return order
+        order = self.create_order(symbol, type, side, amount)
+        order['clientOrderId'] = client_order_id
+        with self._lock:
+            self.by_client_id[client_order_id] = order
+            if len(self.by_client_id) > self._journal_size:
+                self.by_client_id.popitem(last=False)
+        return order
+
+    def fetch_order_by_client_id(self, symbol, client_order_id):
+        with self._lock:
+            return self.by_client_id.get(client_order_id)
+
     def create_order(self, symbol, type, side, amount):
         # Fake execution
-        ticker = self.fetch_ticker(symbol)
-        price = ticker['last']
-        
+        if symbol not in self.quotes:
+            self.fetch_ticker(symbol)
+        bid, ask, now = self.quotes[symbol]
+        with self._lock:
+            self._next_id += 1
+            order_id = f"paper_{self._next_id}"
         order = {
+            'id': order_id,
+            'timestamp': now,
             'symbol': symbol,
             'type': type,
             'side': side,
             'amount': amount,
-            'price': price,
-            'status': 'closed', # Market orders fill instantly
-            'id': f"paper_{len(self.orders)+1}"
+            'filled': 0.0,
+            'price': None,
+            'average': None,
+            'status': 'open',
+            'fee': {'cost': 0.0},
         }
-        self.orders.append(order)
-        print(f"[PAPER TRADE] {side.upper()} {amount} {symbol} @ {price}")
+        if self.latency_ms:
+            # The quote keeps moving while the order is on its way
+            with self._lock:
+                self._pending.setdefault(symbol, deque()).append((now + self.latency_ms, order))
+            return order
+        self._fill(order, bid, ask, now)
         return order
+
+    def _fill_due(self, symbol, bid, ask, timestamp):
+        due = []
+        with self._lock:
+            pending = self._pending[symbol]
+            while pending and pending[0][0] <= timestamp:
+                due.append(pending.popleft()[1])
+        for order in due:
+            self._fill(order, bid, ask, timestamp)
+
+    def _fill(self, order, bid, ask, timestamp):
+        # Market orders fill completely at the quote's time
+        symbol, side, amount = order['symbol'], order['side'], order['amount']
+        slip = self.slippage_bps / 10000
+        price = ask * (1 + slip) if side == 'buy' else bid * (1 - slip)
+        fee = price * amount * self.fee_bps / 10000
+        with self._lock:
+            self._apply_fill(symbol, side, amount, price, fee)
+            self.journal.append((timestamp, order['id'], symbol, side, amount, price, fee))
+            order.update(timestamp=timestamp, filled=amount, price=price, average=price,
+                         status='closed', fee={'cost': fee})
+        log.info("[PAPER TRADE] %s %s %s @ %s", side.upper(), amount, symbol, price)
+
+    def _apply_fill(self, symbol, side, amount, price, fee):
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = {'qty': 0.0, 'avg_price': 0.0, 'realized': 0.0, 'fees': 0.0}
+        qty = pos['qty']
+        signed = amount if side == 'buy' else -amount
+        pos['fees'] += fee
+        pos['realized'] -= fee
+
+        if qty == 0 or (qty > 0) == (signed > 0):
+            # Opening or adding: volume-weighted entry
+            new_qty = qty + signed
+            pos['avg_price'] = (pos['avg_price'] * abs(qty) + price * amount) / abs(new_qty)
+            pos['qty'] = new_qty
+            return
+
+        # Reducing, closing or flipping
+        closed = min(abs(qty), amount)
+        pos['realized'] += closed * (price - pos['avg_price']) * (1 if qty > 0 else -1)
+        new_qty = qty + signed
+        if abs(new_qty) < 1e-12:
+            pos['qty'], pos['avg_price'] = 0.0, 0.0
+        else:
+            if (new_qty > 0) != (qty > 0):
+                pos['avg_price'] = price
+            pos['qty'] = new_qty
+
+    def pnl(self, symbol=None):
+        """
+        {'realized', 'unrealized', 'fees'} for one symbol or all, marking open
+        positions at the cached mid.
+        """
+        with self._lock:
+            return self._pnl(symbol)
+
+    def _pnl(self, symbol):
+        symbols = [symbol] if symbol else list(self.positions)
+        out = {'realized': 0.0, 'unrealized': 0.0, 'fees': 0.0}
+        for s in symbols:
+            pos = self.positions.get(s)
+            if pos is None:
+                continue
+            out['realized'] += pos['realized']
+            out['fees'] += pos['fees']
+            if pos['qty'] and s in self.quotes:
+                bid, ask, _ = self.quotes[s]
+                out['unrealized'] += pos['qty'] * ((bid + ask) / 2 - pos['avg_price'])
+        return out
+
+    def journal_frame(self):
+        import pandas as pd
+        with self._lock:
+            rows = list(self.journal)
+        return pd.DataFrame(rows, columns=self.JOURNAL_FIELDS)
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+# A feed is any async iterator of (timestamp_ms, price) tuples.
+# TradingBot.run_async consumes one; the exchange, a socket replay server or a
+# plain list can all stand behind it.
+
+class CcxtTradeFeed:
+    """
+    Streams public trades for one symbol over the exchange websocket
+    (ccxt.pro watch_trades). Reconnects on errors.
+    """
+    def __init__(self, symbol, exchange=None, exchange_id='binance'):
+        self.symbol = symbol
+        self.exchange = exchange
+        self.exchange_id = exchange_id
+
+    async def __aiter__(self):
+        if self.exchange is None:
+            import ccxt.pro
+            self.exchange = getattr(ccxt.pro, self.exchange_id)({'enableRateLimit': True})
+        last_ts = 0
+        while True:
+            try:
+                trades = await self.exchange.watch_trades(self.symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Trade feed error (%s): %s", self.symbol, e)
+                await asyncio.sleep(1)
+                continue
+            # watch_trades returns a rolling cache; only yield what is new
+            for t in trades:
+                if t['timestamp'] > last_ts:
+                    yield t['timestamp'], t['price']
+            if trades:
+                last_ts = max(last_ts, trades[-1]['timestamp'])
+
+    async def close(self):
+        if self.exchange is not None:
+            await self.exchange.close()
+
+class SocketFeed:
+    """
+    Reads JSON lines {"ts": <ms>, "price": <float>} from a TCP server, e.g. a
+    local replay server started with serve_ticks().
+    """
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                yield msg['ts'], msg['price']
+        finally:
+            writer.close()
+
+class IterableFeed:
+    """
+    Wraps an in-memory sequence of (timestamp_ms, price) ticks.
+    """
+    def __init__(self, ticks):
+        self.ticks = ticks
+
+    async def __aiter__(self):
+        for tick in self.ticks:
+            yield tick
+
+async def serve_ticks(ticks, host='127.0.0.1', port=0, interval=0.0):
+    """
+    Starts a local server that streams `ticks` as JSON lines to every client,
+    standing in for the exchange feed. Returns the asyncio server; the bound
+    port is server.sockets[0].getsockname()[1].
+    """
+    async def handle(reader, writer):
+        try:
+            for ts, price in ticks:
+                writer.write(json.dumps({'ts': ts, 'price': price}).encode() + b'\n')
+                if interval:
+                    await asyncio.sleep(interval)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
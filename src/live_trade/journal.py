@@ -0,0 +1,68 @@
+import json
+import os
+import re
+
+STATE_DIR = 'data/state'
+
+class StateJournal:
+    """
+    Append-only JSON-lines journal of a bot's strategy state. Each line is a
+    full snapshot ({'ts', 'date', 'daily_trade_taken', 'active_position'}),
+    written whenever the state changes, so restoring is reading the last
+    line. When the file grows past `max_bytes` it is rewritten down to its
+    last snapshot.
+    """
+    def __init__(self, path, max_bytes=1 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def for_bot(cls, name, state_dir=STATE_DIR, **kwargs):
+        # 'BTC/USDT' -> data/state/BTC_USDT.jsonl
+        return cls(os.path.join(state_dir, re.sub(r'[^A-Za-z0-9._-]', '_', name) + '.jsonl'), **kwargs)
+
+    def append(self, state):
+        line = json.dumps(state, separators=(',', ':'), default=str) + '\n'
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        if size > self.max_bytes:
+            self.compact(line)
+
+    def compact(self, line=None):
+        line = line or (json.dumps(self.last(), separators=(',', ':')) + '\n')
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(line)
+        os.replace(tmp, self.path)
+
+    def last(self, block_size=4096):
+        """
+        Latest snapshot, or None. A torn final line (crash mid-write) is
+        skipped in favour of the one before it.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return None
+        with f:
+            # Reads backwards from the end so the history is not scanned
+            f.seek(0, os.SEEK_END)
+            end = f.tell()
+            data = b''
+            while end > 0:
+                start = max(0, end - block_size)
+                f.seek(start)
+                data = f.read(end - start) + data
+                lines = data.splitlines()
+                # The first line may be cut by the block boundary
+                for line in reversed(lines if start == 0 else lines[1:]):
+                    try:
+                        return json.loads(line)
+                    except ValueError:
+                        continue
+                end = start
+        return None
@@ -0,0 +1,121 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_FILE = 'logs/trading_bot.log'
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time (epoch s), level, logger, message, plus
+    'event' and its fields for records logged with event().
+    """
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        name = getattr(record, 'event', None)
+        if name is not None:
+            entry['event'] = name
+            entry.update(record.fields)
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record as logged: `msg % args` is left to
+    the handlers on the listener thread, where the stock prepare() would
+    format it on the calling thread. Only a traceback is rendered here, while
+    its frames are still alive. Arguments are therefore read later, so
+    callers pass copies of state they go on mutating (see event()).
+    """
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def event(logger, name, msg, *args, level=logging.INFO, **fields):
+    """
+    Logs a structured event (e.g. 'signal', 'entry', 'exit') with `fields`
+    as its JSON keys; `msg % args` is the human-readable line. Returns at the
+    level check when the level is disabled. Both are formatted on the log
+    writer thread, so mutable arguments and fields must be copies.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, *args, extra={'event': name, 'fields': fields})
+
+def setup_logging(path=LOG_FILE, level=logging.INFO, console=True):
+    """
+    Routes all logging through a queue: callers only enqueue the unformatted
+    record (DeferredQueueHandler), and a background QueueListener thread
+    formats it and writes JSON lines to `path` (and plain text to stdout if
+    `console`). Keeps message formatting and file and terminal I/O off the
+    tick path. Returns the listener; it is stopped, flushing the queue, at
+    exit.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+
+    q = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(q))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+def _stop_listener(listener):
+    # At exit; the listener may have been stopped already
+    if getattr(listener, '_thread', None) is not None:
+        listener.stop()
+
+def tail_events(path=LOG_FILE, n=50, block_size=65536):
+    """
+    The last `n` records of a JSON-lines log, oldest first. Reads backwards
+    from the end, so it stays fast however large the log grows; lines that
+    are not JSON (e.g. a torn last write) are skipped.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        data = b''
+        lines = []
+        while end > 0 and len(lines) <= n:
+            start = max(0, end - block_size)
+            f.seek(start)
+            data = f.read(end - start) + data
+            lines = data.splitlines()
+            end = start
+        # The first line may be cut by the block boundary
+        if end > 0:
+            lines = lines[1:]
+    records = []
+    for line in lines[-n:]:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Hot path stages timed by TradingBot
+STAGES = ('ticker_fetch', 'decision', 'order_submit', 'order_ack')
+
+class LatencyWindow:
+    """
+    Fixed-size ring buffer of the most recent latencies (seconds).
+    Recording is one list store; percentiles are computed on read.
+    """
+    def __init__(self, size=4096):
+        self._buf = [0.0] * size
+        self._size = size
+        self._n = 0
+
+    def observe(self, seconds):
+        self._buf[self._n % self._size] = seconds
+        self._n += 1
+
+    @property
+    def count(self):
+        return self._n
+
+    def summary(self):
+        import numpy as np
+        # Copy first: observe() may run on another thread while we read
+        values = np.array(self._buf[:min(self._n, self._size)])
+        if not len(values):
+            return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        p50, p99 = np.percentile(values, [50, 99]) * 1000
+        return {'count': self._n, 'p50_ms': round(p50, 4), 'p99_ms': round(p99, 4),
+                'max_ms': round(values.max() * 1000, 4)}
+
+class Metrics:
+    """
+    In-process latency windows and counters for the trading hot path.
+    Read it with snapshot() / render(), or expose it with serve() (text
+    endpoint) and start_snapshots() (JSON file rewritten periodically).
+    """
+    def __init__(self, window=4096):
+        self.window = window
+        self.started = time.time()
+        self.latency = {stage: LatencyWindow(window) for stage in STAGES}
+        self.counters = {'ticks': 0, 'signals': 0, 'orders': 0, 'order_errors': 0}
+
+    def observe(self, stage, seconds):
+        window = self.latency.get(stage)
+        if window is None:
+            window = self.latency[stage] = LatencyWindow(self.window)
+        window.observe(seconds)
+
+    def incr(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        return {
+            'time': time.time(),
+            'uptime_s': round(time.time() - self.started, 1),
+            'counters': dict(self.counters),
+            'latency': {stage: w.summary() for stage, w in list(self.latency.items())},
+        }
+
+    def render(self):
+        """
+        Snapshot in a plain-text, Prometheus-style exposition format.
+        """
+        snap = self.snapshot()
+        lines = [f"trading_uptime_seconds {snap['uptime_s']}"]
+        for name, value in snap['counters'].items():
+            lines.append(f"trading_{name}_total {value}")
+        for stage, s in snap['latency'].items():
+            lines.append(f'trading_latency_count{{stage="{stage}"}} {s["count"]}')
+            for key in ('p50_ms', 'p99_ms', 'max_ms'):
+                if s[key] is not None:
+                    lines.append(f'trading_latency_{key}{{stage="{stage}"}} {s[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_snapshot(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+
+    def start_snapshots(self, path='logs/metrics.json', interval=10.0):
+        """
+        Rewrites `path` with a JSON snapshot every `interval` seconds from a
+        daemon thread.
+        """
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.write_snapshot(path)
+
+        thread = threading.Thread(target=loop, name='metrics-snapshots', daemon=True)
+        thread.start()
+        return thread
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """
+        Serves render() over HTTP (GET /metrics, or /metrics.json for the raw
+        snapshot) from a daemon thread. Returns the server.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics.json':
+                    body, kind = json.dumps(metrics.snapshot()).encode(), 'application/json'
+                else:
+                    body, kind = metrics.render().encode(), 'text/plain; version=0.0.4'
+                self.send_response(200)
+                self.send_header('Content-Type', kind)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+# Process-wide registry; bots record here unless given their own
+METRICS = Metrics()
@@ -0,0 +1,155 @@
+import asyncio
+import inspect
+import logging
+import time
+import uuid
+
+from src.live_trade.log import event
+from src.live_trade.metrics import METRICS
+
+log = logging.getLogger(__name__)
+
+class OrderUnresolved(RuntimeError):
+    # An order request whose outcome on its venue is not known yet
+    pass
+
+def new_client_order_id(prefix='sb'):
+    # Binance accepts up to 36 chars of [.A-Z:/a-z0-9_-]
+    return f"{prefix}{uuid.uuid4().hex[:30]}"
+
+class OrderPipeline:
+    """
+    Sends orders off the tick path. submit() only queues the request; a pool
+    of worker tasks sends queued orders concurrently through the (blocking)
+    adapter on executor threads.
+
+    Every order carries a client order ID that is reused on each retry, so a
+    request that timed out but reached the exchange is found with
+    fetch_order_by_client_id() instead of being placed twice (the exchange
+    also rejects a repeated ID). Results come back through the on_fill /
+    on_fail callbacks, which may be plain functions or coroutines. An order
+    still unresolved after the last retry (OrderUnresolved) is queued again
+    under the same ID rather than reported as failed.
+
+    The adapter must provide submit_order(symbol, type, side, amount,
+    client_order_id) -> order (raising on failure) and
+    fetch_order_by_client_id(symbol, client_order_id) -> order or None.
+    """
+    def __init__(self, adapter, workers=4, retries=3, backoff=0.5, timeout=10.0, metrics=None):
+        self.adapter = adapter
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.metrics = metrics or METRICS
+        self._queue = None
+        self._tasks = []
+
+    def start(self):
+        # Must be called from the running event loop
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Waits for queued orders to finish, then stops the workers.
+        """
+        if not self._tasks:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, symbol, side, amount, type='market', on_fill=None, on_fail=None, signal_at=None):
+        """
+        Queues an order and returns its client order ID immediately.
+        on_fill(order) runs once the exchange accepted it; on_fail(error)
+        once all retries are spent.
+        """
+        if not self._tasks:
+            self.start()
+        request = {
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'amount': amount,
+            'client_order_id': new_client_order_id(),
+            'on_fill': on_fill,
+            'on_fail': on_fail,
+            'signal_at': signal_at or time.perf_counter(),
+        }
+        self._queue.put_nowait(request)
+        return request['client_order_id']
+
+    async def _worker(self):
+        while True:
+            request = await self._queue.get()
+            try:
+                await self._send(request)
+            except Exception as e:
+                log.error("Order pipeline error (%s): %s", request['client_order_id'], e)
+            finally:
+                self._queue.task_done()
+
+    async def _call(self, fn, *args):
+        return await asyncio.wait_for(asyncio.to_thread(fn, *args), self.timeout)
+
+    async def _send(self, request):
+        cid = request['client_order_id']
+        self.metrics.observe('order_submit', time.perf_counter() - request['signal_at'])
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.metrics.incr('order_retries')
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                # The last attempt may have reached the exchange before failing
+                order = await self._lookup(request)
+                if order:
+                    return await self._done(request, order)
+            t0 = time.perf_counter()
+            try:
+                order = await self._call(self.adapter.submit_order, request['symbol'], request['type'],
+                                         request['side'], request['amount'], cid)
+            except Exception as e:
+                error = e
+                log.warning("Order %s attempt %s failed: %r", cid, attempt + 1, e)
+                continue
+            self.metrics.observe('order_ack', time.perf_counter() - t0)
+            return await self._done(request, order)
+
+        # A rejected retry may just be the exchange refusing a duplicate ID
+        order = await self._lookup(request)
+        if order:
+            return await self._done(request, order)
+        if isinstance(error, OrderUnresolved):
+            log.warning("Order %s still unresolved, sending it again: %s", cid, error)
+            await asyncio.sleep(self.backoff * 2 ** self.retries)
+            await self._queue.put(request)
+            return
+        self.metrics.incr('order_errors')
+        event(log, 'order_failed', "Order %s failed after %s attempts: %r", cid, self.retries + 1, error,
+              level=logging.ERROR, client_order_id=cid, symbol=request['symbol'], side=request['side'],
+              amount=request['amount'], error=repr(error))
+        await self._callback(request['on_fail'], error)
+
+    async def _lookup(self, request):
+        try:
+            return await self._call(self.adapter.fetch_order_by_client_id, request['symbol'], request['client_order_id'])
+        except Exception as e:
+            log.warning("Order lookup %s failed: %r", request['client_order_id'], e)
+            return None
+
+    async def _done(self, request, order):
+        self.metrics.incr('orders')
+        await self._callback(request['on_fill'], order)
+
+    async def _callback(self, fn, arg):
+        if fn is None:
+            return
+        result = fn(arg)
+        if inspect.isawaitable(result):
+            await result
@@ -0,0 +1,210 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import Backtester
+from src.data_loader.store import CandleStore, TIMEFRAMES
+from src.live_trade.bot import IST, TradingBot
+from src.live_trade.metrics import Metrics
+
+class ReplayClock:
+    """
+    Simulated wall clock for TradingBot(clock=...): the replay loop sets
+    ts_ms, the bot reads it back as an IST datetime.
+    """
+    __slots__ = ('ts_ms',)
+
+    def __init__(self, ts_ms=0):
+        self.ts_ms = ts_ms
+
+    def __call__(self):
+        return datetime.fromtimestamp(self.ts_ms / 1000, IST)
+
+class ReplayAdapter:
+    """
+    Exchange stand-in for replays: fetch_ticker returns the current replay
+    price and orders fill at it immediately. Fills are kept as
+    (timestamp_ms, side, amount, price) tuples.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.price = None
+        self.fills = []
+        self._ticker = {'symbol': None, 'last': None, 'timestamp': None}
+
+    def fetch_ticker(self, symbol):
+        # One reused dict: no allocation per tick
+        ticker = self._ticker
+        ticker['symbol'] = symbol
+        ticker['last'] = self.price
+        ticker['timestamp'] = self.clock.ts_ms
+        return ticker
+
+    def create_order(self, symbol, type, side, amount):
+        self.fills.append((self.clock.ts_ms, side, amount, self.price))
+        return {
+            'id': f"replay_{len(self.fills)}",
+            'symbol': symbol,
+            'type': type,
+            'side': side,
+            'amount': amount,
+            'price': self.price,
+            'average': self.price,
+            'status': 'closed',
+        }
+
+    def submit_order(self, symbol, type, side, amount, client_order_id):
+        return self.create_order(symbol, type, side, amount)
+
+    def fetch_order_by_client_id(self, symbol, client_order_id):
+        return None
+
+def bar_ticks(data_path, tf='5m', start=None, end=None):
+    """
+    Expands stored bars into a tick path, four ticks per bar at mid prices
+    (bid + spread*0.01/2, as in Backtester): open, then the extreme nearer
+    the open's side (low first on an up bar, high first on a down bar), the
+    other extreme, and close just before the bar ends.
+    Returns (timestamp_ms int64, price float64) arrays.
+    """
+    store = CandleStore.open(data_path)
+    arrays = store.arrays(tf)
+    lo, hi = store.row_range(tf, start, end)
+
+    half = arrays['spread'][lo:hi] * 0.01 / 2 if 'spread' in arrays else 0.0
+    o = arrays['open'][lo:hi] + half
+    h = arrays['high'][lo:hi] + half
+    l = arrays['low'][lo:hi] + half
+    c = arrays['close'][lo:hi] + half
+    up = c >= o
+    prices = np.column_stack([o, np.where(up, l, h), np.where(up, h, l), c]).ravel()
+
+    bar_ms = TIMEFRAMES[tf] * 60_000
+    offsets_ms = np.array([0, bar_ms // 4, bar_ms // 2, bar_ms - 1], dtype=np.int64)
+    ts_ms = (np.asarray(arrays['ts'][lo:hi]) // 10**6)[:, None] + offsets_ms
+    return ts_ms.ravel(), prices
+
+def replay(bot, ts_ms, prices):
+    """
+    Drives bot.tick() once per tick. The bot must have been built with a
+    ReplayClock and a ReplayAdapter. Returns ticks per second.
+    """
+    clock, adapter, tick = bot.clock, bot.exchange, bot.tick
+    t0 = time.perf_counter()
+    for ts, price in zip(ts_ms.tolist(), prices.tolist()):
+        clock.ts_ms = ts
+        adapter.price = price
+        tick()
+    return len(ts_ms) / max(time.perf_counter() - t0, 1e-9)
+
+def record_decisions(bot):
+    """
+    Wraps the bot's entry and exit so each decision is logged with the level
+    it acted on (trigger, SL, TP or close), which is what Backtester records;
+    ReplayAdapter fills happen at the next tick's price instead.
+    Returns the list that (timestamp_ms, 'entry' | 'exit', side or reason,
+    price) rows are appended to.
+    """
+    decisions = []
+    clock = bot.clock
+    execute_entry, exit_ = bot.execute_entry, bot._exit
+
+    def entry(side, price):
+        decisions.append((clock.ts_ms, 'entry', side, price))
+        execute_entry(side, price)
+
+    def exit(reason, price):
+        decisions.append((clock.ts_ms, 'exit', reason, price))
+        exit_(reason, price)
+
+    bot.execute_entry, bot._exit = entry, exit
+    return decisions
+
+def decisions_to_trades(decisions):
+    """
+    Pairs entry and exit decisions into Backtester-style trade rows. A
+    position still open at the end of the replay has no exit.
+    """
+    trades = []
+    entry = None
+    for ts, kind, what, price in decisions:
+        if kind == 'entry':
+            entry = (ts, what, price)
+            trades.append({
+                'date': pd.Timestamp(ts, unit='ms').date(),
+                'type': what,
+                'entry_time': pd.Timestamp(ts, unit='ms'),
+                'entry_price': price,
+                'exit_time': pd.NaT,
+                'exit_price': np.nan,
+                'reason': None,
+                'pnl': np.nan,
+            })
+        elif entry is not None:
+            trade = trades[-1]
+            trade['exit_time'] = pd.Timestamp(ts, unit='ms')
+            trade['exit_price'] = price
+            trade['reason'] = what
+            trade['pnl'] = (price - entry[2]) if entry[1] == 'buy' else (entry[2] - price)
+            entry = None
+    return pd.DataFrame(trades, columns=['date', 'type', 'entry_time', 'entry_price', 'exit_time', 'exit_price', 'reason', 'pnl'])
+
+def compare(bot_trades, bt_trades, tolerance=1e-6):
+    """
+    Day-by-day comparison of bot and Backtester trades (by UTC entry date).
+    `status` is 'match' when both took the same side at the same entry and
+    exit (relative `tolerance`), otherwise one of 'bot only', 'backtest only',
+    'side', 'entry', 'exit'.
+    """
+    cols = ['type', 'entry_time', 'entry_price', 'exit_time', 'exit_price', 'reason', 'pnl']
+    a = bot_trades.drop_duplicates('date').set_index('date')[cols].add_prefix('bot_')
+    b = bt_trades.drop_duplicates('date').set_index('date')[cols].add_prefix('bt_') if len(bt_trades) else \
+        pd.DataFrame(columns=['bt_' + c for c in cols])
+    out = a.join(b, how='outer').sort_index()
+
+    def close(x, y):
+        return np.isclose(x.astype(float), y.astype(float), rtol=tolerance, atol=0)
+
+    status = np.full(len(out), 'match', dtype=object)
+    status[~close(out['bot_exit_price'], out['bt_exit_price'])] = 'exit'
+    status[~close(out['bot_entry_price'], out['bt_entry_price'])] = 'entry'
+    status[(out['bot_type'] != out['bt_type']).to_numpy()] = 'side'
+    status[out['bt_type'].isna().to_numpy()] = 'bot only'
+    status[out['bot_type'].isna().to_numpy()] = 'backtest only'
+    out['status'] = status
+    out.index.name = 'date'
+    return out
+
+def replay_vs_backtest(data_path, config=None, start=None, end=None, tf='5m', strategy_version='v1'):
+    """
+    Replays stored bars through a fresh TradingBot and compares its trades
+    with Backtester's for the same days. Returns (comparison, ticks/s).
+    """
+    clock = ReplayClock()
+    adapter = ReplayAdapter(clock)
+    # Bars only, so the bot sees the same bars as Backtester: no per-tick
+    # stops, and levels kept on the trigger (replay fills at the bar close)
+    config = {'symbol': 'REPLAY', 'quantity': 1, 'bar_minutes': 5, 'tick_stops': False, 'rebase_on_fill': False,
+              **(config or {})}
+    bot = TradingBot(adapter, config, metrics=Metrics(), clock=clock)
+    decisions = record_decisions(bot)
+
+    ts_ms, prices = bar_ticks(data_path, tf, start, end)
+    print(f"Replaying {len(ts_ms)} ticks...")
+    rate = replay(bot, ts_ms, prices)
+    print(f"Replayed at {rate:,.0f} ticks/s")
+
+    bt_trades = Backtester(data_path, strategy_version=strategy_version, engine='vectorized',
+                           start=start, end=end).simulate()
+
+    comparison = compare(decisions_to_trades(decisions), bt_trades)
+    counts = comparison['status'].value_counts()
+    print(f"\nDays with a trade: {len(comparison)}")
+    for status, n in counts.items():
+        print(f"  {status:<14} {n}")
+    return comparison, rate
+
+if __name__ == "__main__":
+    replay_vs_backtest("data/raw/BTCUSDm_M5_202001010000_202601121835.csv")
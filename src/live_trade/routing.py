@@ -0,0 +1,341 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from src.live_trade.orders import OrderUnresolved, new_client_order_id
+
+log = logging.getLogger(__name__)
+
+class VenueTimeout(TimeoutError):
+    # Carries the still-running request so a late result can be traced
+    def __init__(self, message, future):
+        super().__init__(message)
+        self.future = future
+
+def order_rejected(error):
+    """
+    True when `error` means the venue refused the order outright (it answered
+    with an error, or refused the connection), so no order exists there.
+    Timeouts and other network errors leave that open.
+    """
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    ccxt = sys.modules.get('ccxt')
+    return ccxt is not None and isinstance(error, ccxt.ExchangeError)
+
+class VenueStats:
+    # Rolling health of one venue, updated after every routed call
+    __slots__ = ('rtt', 'quote_lag', 'calls', 'errors', 'timeouts', 'failures', 'down_until')
+
+    def __init__(self):
+        self.rtt = None # EWMA round trip (s)
+        self.quote_lag = 0.0 # EWMA age of the venue's quotes on arrival (s)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.failures = 0 # consecutive
+        self.down_until = 0.0
+
+class RoutingAdapter:
+    """
+    Adapter over several venues' adapters ({name: adapter}) that sends each
+    call to the fastest healthy venue and fails over to the next one within
+    the same call.
+
+    Every call runs on a worker thread with a `timeout`; the round trip and,
+    for tickers, the quote's age on arrival feed per-venue EWMAs (`alpha`)
+    that rank the venues. A timeout takes the venue out of rotation for
+    `cooldown` seconds, and so do `max_failures` errors in a row. Every
+    `probe_interval` seconds, tickers are requested from all venues in the
+    background so idle venues keep fresh numbers.
+
+    `symbols` optionally maps a venue name to {symbol: venue symbol}.
+
+    Orders carry a client order ID and fail over only when the venue
+    definitely has no such order: it rejected it, or, after a timeout or
+    network error, the late reply or a lookup by client order ID says so
+    (waiting up to `settle_timeout` for a request still in flight). When
+    neither answers, the call raises OrderUnresolved and the ID stays pinned
+    to that venue, so a retry settles it there first. A pinned order that
+    goes through after its caller was told it failed is logged and kept in
+    `orphans` until it is looked up.
+    """
+    def __init__(self, venues, timeout=1.0, alpha=0.2, cooldown=30.0, max_failures=3,
+                 probe_interval=10.0, symbols=None, settle_timeout=2.0):
+        self.venues = dict(venues)
+        self.timeout = timeout
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.probe_interval = probe_interval
+        self.symbols = symbols or {}
+        self.stats = {name: VenueStats() for name in self.venues}
+        self.settle_timeout = settle_timeout
+        self.orphans = {} # client order ID -> (venue, order)
+        self.order_venues = OrderedDict() # client order ID -> every venue it was sent to
+        self.unresolved = {} # client order ID -> (venue, in-flight future or None)
+        self.max_tracked_orders = 10_000
+        # Stalled calls keep their worker, so leave room for a few per venue
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(self.venues), thread_name_prefix='route')
+        self._lock = threading.Lock()
+        self._last_probe = 0.0
+
+    def ranked(self):
+        """
+        Venue names, healthy ones first, fastest (round trip + quote lag)
+        first. Venues never measured rank ahead so they get measured.
+        """
+        now = time.monotonic()
+
+        def key(name):
+            s = self.stats[name]
+            return (s.down_until > now, -1.0 if s.rtt is None else s.rtt + s.quote_lag)
+        return sorted(self.venues, key=key)
+
+    def _symbol(self, venue, symbol):
+        return self.symbols.get(venue, {}).get(symbol, symbol)
+
+    def _record(self, venue, rtt=None, error=None, timed_out=False):
+        s = self.stats[venue]
+        with self._lock:
+            s.calls += 1
+            if error is None:
+                s.rtt = rtt if s.rtt is None else s.rtt + self.alpha * (rtt - s.rtt)
+                s.failures = 0
+                return
+            s.errors += 1
+            s.failures += 1
+            if timed_out:
+                s.timeouts += 1
+            if timed_out or s.failures >= self.max_failures:
+                s.down_until = time.monotonic() + self.cooldown
+                log.warning("Venue %s out of rotation for %.0fs: %s", venue, self.cooldown, error)
+
+    def _call(self, venue, method, *args, **kwargs):
+        # One attempt on one venue; raises on error or timeout
+        fn = getattr(self.venues[venue], method)
+        t0 = time.perf_counter()
+        future = self._pool.submit(fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._record(venue, error=f"{method} timed out after {self.timeout}s", timed_out=True)
+            future.cancel()
+            raise VenueTimeout(f"{venue}.{method} timed out", future) from None
+        except Exception as e:
+            self._record(venue, error=e)
+            raise
+        self._record(venue, rtt=time.perf_counter() - t0)
+        return result
+
+    def _route(self, method, symbol, *args, **kwargs):
+        errors = []
+        for venue in self.ranked():
+            try:
+                return venue, self._call(venue, method, self._symbol(venue, symbol), *args, **kwargs)
+            except Exception as e:
+                errors.append(f"{venue}: {e}")
+                log.warning("%s on %s failed, failing over: %s", method, venue, e)
+        raise RuntimeError(f"{method} failed on every venue ({'; '.join(errors)})")
+
+    def _observe_quote(self, venue, ticker):
+        ts = ticker.get('timestamp') if ticker else None
+        if ts:
+            lag = max(0.0, time.time() - ts / 1000)
+            s = self.stats[venue]
+            s.quote_lag += self.alpha * (lag - s.quote_lag)
+
+    def probe(self, symbol):
+        """
+        Requests `symbol`'s ticker from every venue at once, updating their
+        stats; waits for at most one timeout.
+        """
+        def one(venue):
+            try:
+                self._observe_quote(venue, self._call(venue, 'fetch_ticker', self._symbol(venue, symbol)))
+            except Exception:
+                pass
+        threads = [threading.Thread(target=one, args=(venue,), daemon=True) for venue in self.venues]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(self.timeout)
+
+    def fetch_ticker(self, symbol):
+        now = time.monotonic()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now
+            threading.Thread(target=self.probe, args=(symbol,), name='route-probe', daemon=True).start()
+        venue, ticker = self._route('fetch_ticker', symbol)
+        self._observe_quote(venue, ticker)
+        return ticker
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        return self._route('fetch_ohlcv', symbol, timeframe, since, limit)[1]
+
+    def on_quote(self, symbol, bid, ask=None, timestamp=None):
+        # Streamed quotes reach the venues that fill from them (paper)
+        for venue, adapter in self.venues.items():
+            if hasattr(adapter, 'on_quote'):
+                adapter.on_quote(self._symbol(venue, symbol), bid, ask, timestamp)
+
+    def create_order(self, symbol, type, side, amount):
+        # Sent with a client order ID so an unanswered request can be looked
+        # up. OrderUnresolved is raised, not turned into a failure: the order
+        # may exist, so only submit_order() under the same ID may retry it.
+        try:
+            venue, order = self._route_order('submit_order', symbol, type, side, amount,
+                                             client_order_id=new_client_order_id())
+        except OrderUnresolved:
+            raise
+        except Exception as e:
+            log.error("Order Failed: %s", e)
+            return None
+        order['venue'] = venue
+        return order
+
+    def submit_order(self, symbol, type, side, amount, client_order_id):
+        venue, order = self._route_order('submit_order', symbol, type, side, amount,
+                                         client_order_id=client_order_id)
+        order['venue'] = venue
+        return order
+
+    def _route_order(self, method, symbol, *args, client_order_id, **kwargs):
+        cid = client_order_id
+        sent = self.order_venues.get(cid)
+        if sent is None:
+            sent = self.order_venues[cid] = []
+            if len(self.order_venues) > self.max_tracked_orders:
+                self.order_venues.popitem(last=False)
+        pending = self.unresolved.pop(cid, None)
+        if pending is not None:
+            # An earlier attempt may still exist: settle it before sending anywhere
+            venue, future = pending
+            order = self._settle(venue, symbol, cid, future)
+            if order:
+                return venue, order
+
+        errors = []
+        for venue in self.ranked():
+            if venue not in sent:
+                sent.append(venue)
+            try:
+                order = self._call(venue, method, self._symbol(venue, symbol), *args,
+                                   client_order_id=cid, **kwargs)
+            except Exception as e:
+                if not order_rejected(e):
+                    # It may have reached the venue: fail over only once it is known not to have
+                    order = self._settle(venue, symbol, cid, getattr(e, 'future', None))
+                    if order:
+                        return venue, order
+                errors.append(f"{venue}: {e}")
+            else:
+                if order:
+                    return venue, order
+                errors.append(f"{venue}: order rejected")
+            log.warning("%s on %s failed, failing over: %s", method, venue, errors[-1])
+        raise RuntimeError(f"{method} failed on every venue ({'; '.join(errors)})")
+
+    def _settle(self, venue, symbol, cid, future=None):
+        """
+        The order `cid` on `venue` after a failed or unanswered request: the
+        order if it exists, None if it definitely does not. Waits up to
+        `settle_timeout` for a request still in flight, then asks the venue.
+        Raises OrderUnresolved, and pins `cid` to `venue`, when neither
+        answers.
+        """
+        if future is not None:
+            try:
+                order = future.result(timeout=self.settle_timeout)
+            except FutureTimeout:
+                self.unresolved[cid] = (venue, future)
+                future.add_done_callback(lambda f: self._late_order(venue, cid, f))
+                raise OrderUnresolved(f"order {cid} on {venue} still unanswered") from None
+            except Exception as e:
+                if order_rejected(e):
+                    return None
+            else:
+                # A late reply: the order went through, or was rejected (None)
+                self.orphans.pop(cid, None)
+                return order or None
+        try:
+            order = self._call(venue, 'fetch_order_by_client_id', self._symbol(venue, symbol), cid)
+        except Exception as e:
+            self.unresolved[cid] = (venue, None)
+            raise OrderUnresolved(f"order {cid} on {venue} unknown, lookup failed: {e}") from e
+        self.orphans.pop(cid, None)
+        return order or None
+
+    def _late_order(self, venue, cid, future):
+        # The caller was told this order failed, but it went through (and
+        # nothing has settled it since)
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        if self.unresolved.get(cid, (None, None))[1] is not future:
+            return
+        order = future.result()
+        self.orphans[cid] = (venue, order)
+        log.error("Late order %s on %s after its request gave up: %s", cid, venue, order)
+
+    def fetch_order_by_client_id(self, symbol, client_order_id):
+        # Every venue the order was sent to, in order. None only when all of
+        # them answered; a venue that can't be asked makes the lookup fail.
+        error = None
+        for venue in self.order_venues.get(client_order_id, ()):
+            try:
+                order = self._call(venue, 'fetch_order_by_client_id', self._symbol(venue, symbol), client_order_id)
+            except Exception as e:
+                error = e
+                continue
+            if order:
+                self.unresolved.pop(client_order_id, None)
+                self.orphans.pop(client_order_id, None)
+                return order
+        if error is not None:
+            raise error
+        return None
+
+    def snapshot(self):
+        """
+        Per-venue stats for dashboards/logs.
+        """
+        now = time.monotonic()
+        return {name: {
+            'rtt_ms': None if s.rtt is None else round(s.rtt * 1000, 2),
+            'quote_lag_ms': round(s.quote_lag * 1000, 2),
+            'calls': s.calls, 'errors': s.errors, 'timeouts': s.timeouts,
+            'healthy': s.down_until <= now,
+        } for name, s in self.stats.items()}
+
+class DelayedAdapter:
+    """
+    Stand-in venue for exercising RoutingAdapter locally: wraps an adapter
+    and sleeps `delay` seconds (plus up to `jitter`) before each call.
+    Setting `stall` makes calls hang for `stall` seconds instead, and `fail`
+    makes them refuse the connection.
+    """
+    def __init__(self, adapter, delay=0.0, jitter=0.0, stall=0.0, fail=False):
+        self.adapter = adapter
+        self.delay = delay
+        self.jitter = jitter
+        self.stall = stall
+        self.fail = fail
+
+    def _wait(self):
+        import random
+        if self.fail:
+            raise ConnectionRefusedError("venue unavailable")
+        time.sleep(self.stall or self.delay + random.random() * self.jitter)
+
+    def __getattr__(self, name):
+        attr = getattr(self.adapter, name)
+        if not callable(attr) or name == 'on_quote':
+            return attr
+
+        def call(*args, **kwargs):
+            self._wait()
+            return attr(*args, **kwargs)
+        return call
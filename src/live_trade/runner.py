@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from src.live_trade.bot import IST, TradingBot
+from src.live_trade.feeds import CcxtTradeFeed
+from src.live_trade.journal import STATE_DIR, StateJournal
+from src.live_trade.orders import OrderPipeline
+
+log = logging.getLogger(__name__)
+
+class StrategyRunner:
+    """
+    Hosts many TradingBot instances (symbol x parameter set) on one event loop.
+    All bots place orders through one shared adapter, and each symbol is
+    subscribed to once: its ticks are fanned out to every bot trading it.
+
+    `feed_factory(symbol)` returns the feed for a symbol (an async iterator of
+    (timestamp_ms, price), see feeds.py). By default it is a CcxtTradeFeed on
+    one shared ccxt.pro client, so all symbols ride the same connection.
+    Orders from every bot go through one OrderPipeline, so a slow order
+    never holds up the ticks of other bots.
+
+    Each bot journals its state under `state_dir` (None disables it), and on
+    start every symbol's session candles are fetched once to warm-start all
+    of its bots.
+    """
+    def __init__(self, adapter, feed_factory=None, exchange_id='binance', orders=None, state_dir=STATE_DIR):
+        self.adapter = adapter
+        self.state_dir = state_dir
+        self.orders = orders or OrderPipeline(adapter)
+        self.exchange_id = exchange_id
+        self.feed_factory = feed_factory or self._ccxt_feed
+        self.bots = defaultdict(list) # symbol -> [TradingBot]
+        self._client = None
+
+    @classmethod
+    def from_configs(cls, adapter, configs, **kwargs):
+        runner = cls(adapter, **kwargs)
+        for config in configs:
+            runner.add(config)
+        return runner
+
+    def add(self, config):
+        symbol = config['symbol']
+        if 'name' not in config and self.bots[symbol]:
+            # Journals are per name, so parameter sets on one symbol need distinct names
+            config = {**config, 'name': f"{symbol}#{len(self.bots[symbol])}"}
+        journal = None
+        if self.state_dir is not None:
+            journal = StateJournal.for_bot(config.get('name', symbol), self.state_dir)
+        bot = TradingBot(self.adapter, config, orders=self.orders, journal=journal)
+        self.bots[config['symbol']].append(bot)
+        return bot
+
+    def _ccxt_feed(self, symbol):
+        if self._client is None:
+            import ccxt.pro
+            self._client = getattr(ccxt.pro, self.exchange_id)({'enableRateLimit': True})
+        return CcxtTradeFeed(symbol, exchange=self._client)
+
+    async def _pump(self, symbol, bots):
+        # Paper adapters fill from the streamed price instead of a REST ticker
+        on_quote = getattr(self.adapter, 'on_quote', None)
+        async for ts_ms, price in self.feed_factory(symbol):
+            if on_quote is not None:
+                on_quote(symbol, price, timestamp=ts_ms)
+            now = datetime.fromtimestamp(ts_ms / 1000, IST)
+            for bot in bots:
+                try:
+                    bot.on_price(price, now)
+                except Exception as e:
+                    log.error("[%s] Error handling tick: %s", bot.name, e)
+
+    def _warm_start(self, bots):
+        try:
+            candles = bots[0].session_candles()
+        except Exception as e:
+            log.error("Session backfill failed for %s: %s", bots[0].config['symbol'], e)
+            candles = []
+        for bot in bots:
+            bot.warm_start(candles)
+
+    async def run(self):
+        n = sum(len(bots) for bots in self.bots.values())
+        log.info("Starting runner: %s bots on %s symbols", n, len(self.bots))
+        print(f"Runner Started. {n} bots on {len(self.bots)} symbols...")
+        # One candle request per symbol, all symbols at once
+        await asyncio.gather(*[asyncio.to_thread(self._warm_start, bots) for bots in self.bots.values()])
+        self.orders.start()
+        try:
+            await asyncio.gather(*[self._pump(symbol, bots) for symbol, bots in self.bots.items()])
+        finally:
+            await self.orders.stop()
+            if self._client is not None:
+                await self._client.close()
+
+def load_configs(path, defaults=None):
+    """
+    Reads a JSON list of bot configs (symbol, quantity and any strategy
+    parameter from bot.DEFAULT_PARAMS), each merged over `defaults`.
+    """
+    with open(path) as f:
+        configs = json.load(f)
+    return [{**(defaults or {}), **config} for config in configs]
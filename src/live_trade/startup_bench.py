@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import time
+
+# Each stage runs in a fresh interpreter, so imports and caches start cold
+# (except the on-disk markets cache, which is what the cached stage measures).
+SETUP = "import os; os.makedirs('logs', exist_ok=True); "
+
+STAGES = [
+    ('reference: eager imports',
+     "import ccxt, pandas, dotenv, pytz"),
+    ('bot imports',
+     "import src.live_trade.bot, src.live_trade.execution, src.live_trade.orders, src.live_trade.feeds"),
+    ('bot + adapter',
+     "import src.live_trade.bot; from src.live_trade.execution import BinanceAdapter; BinanceAdapter()"),
+    ('bot + adapter + markets (network)',
+     "import src.live_trade.bot; from src.live_trade.execution import BinanceAdapter; "
+     "BinanceAdapter(markets_max_age=0).load_markets()"),
+    ('bot + adapter + markets (cached)',
+     "import src.live_trade.bot; from src.live_trade.execution import BinanceAdapter; "
+     "BinanceAdapter().load_markets()"),
+]
+
+def time_stage(code, runs=3):
+    """
+    Best-of-`runs` wall time of `code` in a new interpreter, or None if it failed.
+    """
+    best = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', SETUP + code], capture_output=True, text=True)
+        elapsed = time.perf_counter() - t0
+        if proc.returncode != 0:
+            print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed')
+            return None
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_benchmark(runs=3):
+    print(f"{'Stage':<36} | {'Seconds':>8}")
+    print("-" * 48)
+    baseline = time_stage("pass", runs)
+    results = {}
+    for name, code in STAGES:
+        elapsed = time_stage(code, runs)
+        results[name] = elapsed
+        if elapsed is None:
+            shown = f"{'n/a':>8}"
+        else:
+            shown = f"{elapsed - (baseline or 0.0):8.3f}"
+        print(f"{name:<36} | {shown}")
+    if baseline is None:
+        print("\n(interpreter start-up could not be timed; times include it)")
+    else:
+        print(f"\n(interpreter start-up of {baseline:.3f}s subtracted)")
+    return results
+
+if __name__ == "__main__":
+    # Run from the repository root: python -m src.live_trade.startup_bench
+    os.chdir(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    run_benchmark()
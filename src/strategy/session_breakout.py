@@ -0,0 +1,228 @@
+DAY_MS = 24 * 60 * 60 * 1000
+
+def tod_ms(hhmm):
+    """
+    Converts an 'HH:MM' string into milliseconds since midnight.
+    """
+    hours, minutes = hhmm.split(':')
+    return (int(hours) * 60 + int(minutes)) * 60_000
+
+# Session windows (UTC), matched against bar open times
+RANGE_START = tod_ms('02:45')
+RANGE_END = tod_ms('03:55')
+ENTRY_LIMIT = tod_ms('12:30')
+EXIT_TIME = tod_ms('13:40')
+
+class SessionBreakout:
+    """
+    The session-breakout strategy as an incremental state machine, shared
+    by Backtester, backtest_manual_strategy and TradingBot.
+
+    Feed it bars in time order with update(ts_ms, high, low, close) (a tick
+    is a bar with high == low == close). Each call is O(1) and returns None
+    or one decision:
+        ('entry', 'buy' | 'sell', price)
+        ('exit', 'StopLoss' | 'TSL HIT' | 'Target' | 'TimeExit', price)
+    Prices are the levels the rules act on (trigger, SL, TP, or the close of
+    the last bar inside the trade window), as in Backtester; a tick past the
+    trigger enters at its own price. The strategy assumes decisions are
+    carried out; cancel_entry() undoes a failed entry and rebase() moves the
+    levels to the actual fill. check_stops() applies the exit rules to single
+    prices between bars.
+
+    Rules (UTC day, bars labelled by open time): the range is the high/low
+    of bars in [range_start, range_end]. Bars after it and up to exit_time
+    trade: before entry_limit, the first bar through range +/- buffer enters
+    at the trigger (buy wins ties); later bars activate the trailing stop,
+    then check SL, then TP. A position still open closes at the close of the
+    last bar up to exit_time ('TimeExit'): on the exit_time bar itself, else
+    on the next bar seen (or end_of_day()). One trade per day.
+
+    v1 sizes SL/TP/trail in percent of entry, v2 in points (sl_pts, ...).
+    """
+    __slots__ = (
+        'v1', 'buffer_pct', 'sl_pct', 'tp_pct', 'tsl_activate_pct', 'tsl_trail_pct',
+        'sl_pts', 'tp_pts', 'tsl_trail_pts', 'range_start', 'range_end', 'entry_limit', 'exit_time',
+        'day', 'ranged', 'high', 'low', 'traded', 'last_ts', 'last_close',
+        'side', 'entry', 'entry_ts', 'sl', 'tp', 'trailing', 'exit_ts',
+    )
+
+    def __init__(self, version='v1', buffer_pct=0.0005, sl_pct=0.0030, tp_pct=0.0070,
+                 tsl_activate_pct=0.0040, tsl_trail_pct=0.0020, sl_pts=300, tp_pts=700, tsl_trail_pts=200,
+                 range_start=RANGE_START, range_end=RANGE_END, entry_limit=ENTRY_LIMIT, exit_time=EXIT_TIME):
+        self.v1 = version == 'v1'
+        self.buffer_pct = buffer_pct
+        self.sl_pct = sl_pct
+        self.tp_pct = tp_pct
+        self.tsl_activate_pct = tsl_activate_pct
+        self.tsl_trail_pct = tsl_trail_pct
+        self.sl_pts = sl_pts
+        self.tp_pts = tp_pts
+        self.tsl_trail_pts = tsl_trail_pts
+        self.range_start = range_start
+        self.range_end = range_end
+        self.entry_limit = entry_limit
+        self.exit_time = exit_time
+
+        # Day state
+        self.day = None # UTC day number (ts_ms // DAY_MS)
+        self.ranged = False
+        self.high = float('-inf')
+        self.low = float('inf')
+        self.traded = False
+        self.last_ts = None # last bar inside the trade window
+        self.last_close = None
+
+        # Position (side is None when flat); sl/trailing keep their final
+        # values after an exit so callers can record them, with exit_ts (the
+        # bar the exit happened on)
+        self.side = None
+        self.entry = 0.0
+        self.entry_ts = None
+        self.sl = 0.0
+        self.tp = 0.0
+        self.trailing = False
+        self.exit_ts = None
+
+    def new_day(self, day):
+        self.day = day
+        self.ranged = False
+        self.high = float('-inf')
+        self.low = float('inf')
+        self.traded = False
+        self.last_ts = None
+        self.last_close = None
+
+    def add_range(self, high, low):
+        # Folds a range bar (or a warm-start candle) into today's range; NaN is skipped
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.ranged = self.high > float('-inf') and self.low < float('inf')
+
+    def update(self, ts_ms, high, low, close, tick=False):
+        # tick: the input is one traded price, so an entry happens at that
+        # price when it is already past the trigger (bars enter at the trigger)
+        day, tod = divmod(ts_ms, DAY_MS)
+        event = None
+        if day != self.day:
+            # The window closed without an exit_time bar (gap or stale feed)
+            event = self.end_of_day()
+            self.new_day(day)
+
+        if self.range_start <= tod <= self.range_end:
+            self.add_range(high, low)
+            return event
+        if tod > self.exit_time:
+            return self.end_of_day() or event
+        if tod < self.range_start or (self.side is None and not self.ranged):
+            # No range, no entry; a (restored) position is still managed
+            return event
+        self.last_ts = ts_ms
+        self.last_close = close
+
+        if self.side is None:
+            if self.traded or tod > self.entry_limit:
+                return event
+            buy_trigger = self.high * (1 + self.buffer_pct)
+            if high >= buy_trigger:
+                return self._enter('buy', max(buy_trigger, close) if tick else buy_trigger, ts_ms)
+            sell_trigger = self.low * (1 - self.buffer_pct)
+            if low <= sell_trigger:
+                return self._enter('sell', min(sell_trigger, close) if tick else sell_trigger, ts_ms)
+            return event
+
+        event = self._manage(ts_ms, high, low)
+        if event is None and tod == self.exit_time:
+            event = self._close('TimeExit', close, ts_ms)
+        return event
+
+    def end_of_day(self):
+        """
+        Closes a position still open after the trade window, at the close
+        of its last bar. Backtester calls it after each day's bars; live,
+        update() does it on the first bar past the window.
+        """
+        if self.side is None or self.last_close is None:
+            return None
+        return self._close('TimeExit', self.last_close, self.last_ts)
+
+    def _enter(self, side, price, ts_ms):
+        self.side = side
+        self.entry_ts = ts_ms
+        self.trailing = False
+        self.traded = True
+        self._levels(price)
+        return ('entry', side, price)
+
+    def _levels(self, price):
+        self.entry = price
+        if self.side == 'buy':
+            self.sl = price * (1 - self.sl_pct) if self.v1 else price - self.sl_pts
+            self.tp = price * (1 + self.tp_pct) if self.v1 else price + self.tp_pts
+        else:
+            self.sl = price * (1 + self.sl_pct) if self.v1 else price + self.sl_pts
+            self.tp = price * (1 - self.tp_pct) if self.v1 else price - self.tp_pts
+
+    def rebase(self, price):
+        """
+        Re-anchors the open position's entry, SL and TP on `price` (the
+        price it actually filled at), as if it had entered there.
+        """
+        if self.side is not None and not self.trailing:
+            self._levels(price)
+
+    def check_stops(self, ts_ms, price):
+        """
+        Checks the open position's trailing stop, SL and TP against one
+        traded price between bars; returns the exit decision or None.
+        """
+        if self.side is None:
+            return None
+        return self._manage(ts_ms, price, price)
+
+    def _manage(self, ts_ms, high, low):
+        entry = self.entry
+        if self.side == 'buy':
+            if not self.trailing and high >= entry * (1 + self.tsl_activate_pct):
+                self.trailing = True
+                self.sl = entry * (1 - self.tsl_trail_pct) if self.v1 else entry - self.tsl_trail_pts
+            if low <= self.sl:
+                return self._close('TSL HIT' if self.trailing else 'StopLoss', self.sl, ts_ms)
+            if high >= self.tp:
+                return self._close('Target', self.tp, ts_ms)
+        else:
+            if not self.trailing and low <= entry * (1 - self.tsl_activate_pct):
+                self.trailing = True
+                self.sl = entry * (1 + self.tsl_trail_pct) if self.v1 else entry + self.tsl_trail_pts
+            if high >= self.sl:
+                return self._close('TSL HIT' if self.trailing else 'StopLoss', self.sl, ts_ms)
+            if low <= self.tp:
+                return self._close('Target', self.tp, ts_ms)
+        return None
+
+    def _close(self, reason, price, ts_ms):
+        self.side = None
+        self.exit_ts = ts_ms
+        return ('exit', reason, price)
+
+    def cancel_entry(self):
+        # The entry order failed: flat again, and today's trade is still available
+        self.side = None
+        self.traded = False
+
+    def restore(self, side, entry, sl, tp, trailing=False, traded=True, last_ts=None, last_close=None):
+        """
+        Reinstates a position (e.g. from the bot's state journal). last_ts and
+        last_close stand in for its last bar until a new one arrives, so it
+        can be closed at the end of the day even without one.
+        """
+        self.side = side
+        self.entry = entry
+        self.sl = sl
+        self.tp = tp
+        self.trailing = trailing
+        self.traded = traded
+        self.last_ts = last_ts
+        self.last_close = last_close
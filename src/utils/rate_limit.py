@@ -0,0 +1,174 @@
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Priority lanes, served lowest first: orders always go ahead of market data,
+# and market data ahead of history backfills
+ORDERS, MARKET_DATA, HISTORY = 0, 1, 2
+
+# Request-weight budgets per venue (capacity per window, in seconds) and the
+# weight of each call we make. Unknown venues/endpoints get conservative defaults.
+VENUE_LIMITS = {
+    'binance': {
+        'capacity': 6000, 'window': 60.0,
+        'weights': {'fetch_ticker': 2, 'fetch_ohlcv': 2, 'create_order': 1, 'fetch_order': 4, 'load_markets': 20},
+    },
+    'binance-sandbox': {
+        'capacity': 6000, 'window': 60.0,
+        'weights': {'fetch_ticker': 2, 'fetch_ohlcv': 2, 'create_order': 1, 'fetch_order': 4, 'load_markets': 20},
+    },
+}
+DEFAULT_LIMITS = {'capacity': 1200, 'window': 60.0, 'weights': {}}
+
+_schedulers = {}
+_registry_lock = threading.Lock()
+
+def rate_limit_status(error):
+    """
+    429 for "too many requests", 418 for an IP ban, None for anything else.
+    """
+    ccxt = sys.modules.get('ccxt')
+    if ccxt is not None:
+        if isinstance(error, ccxt.RateLimitExceeded):
+            return 429
+        if isinstance(error, ccxt.DDoSProtection):
+            # Bans (418) surface as DDoSProtection with the status in the message
+            return 418 if '418' in str(error) else 429
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if status in (418, 429) else None
+
+def _response_headers(fn):
+    # ccxt keeps the last response's headers on the exchange the bound method belongs to
+    return getattr(getattr(fn, '__self__', None), 'last_response_headers', None) or {}
+
+class RequestScheduler:
+    """
+    Token bucket of request weight shared by every REST caller for one venue.
+
+    Each request takes its endpoint's weight from a budget of `capacity` per
+    `window` seconds, refilled continuously. Waiting requests are served by
+    priority lane, then arrival order; lanes other than ORDERS also leave a
+    `reserve` fraction of the budget untouched, so orders go out even while a
+    backfill is saturating the venue. 429/418 responses empty the bucket and
+    pause everyone, doubling the pause on every consecutive hit (or honouring
+    Retry-After), and reset once a request succeeds. Binance's used-weight
+    header keeps the bucket in step with the venue's own count.
+    """
+    def __init__(self, capacity=1200, window=60.0, weights=None, reserve=0.1, max_backoff=300.0):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.weights = weights or {}
+        self.reserve = reserve * capacity
+        self.max_backoff = max_backoff
+        self.stats = {'requests': 0, 'rate_limited': 0, 'banned': 0, 'wait_s': 0.0}
+
+        self._tokens = float(capacity)
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self._level = 0 # consecutive 429/418 responses
+        self._waiting = [] # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self, endpoint, priority=MARKET_DATA):
+        """
+        Blocks until the request may be sent.
+        """
+        weight = self.weights.get(endpoint, 1)
+        floor = 0.0 if priority == ORDERS else min(self.reserve, self.capacity - weight)
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._cond.notify_all() # A more urgent ticket may now be first in line
+            start = time.monotonic()
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                timeout = None
+                if self._waiting[0] == ticket:
+                    timeout = max(self._blocked_until - now, (weight + floor - self._tokens) / self.rate)
+                    if timeout <= 0:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= weight
+                        self.stats['requests'] += 1
+                        self.stats['wait_s'] += now - start
+                        self._cond.notify_all()
+                        return
+                self._cond.wait(timeout)
+
+    def penalize(self, status, retry_after=None):
+        """
+        Records a 429/418 response; returns the pause applied (seconds).
+        """
+        with self._cond:
+            self._level += 1
+            self.stats['banned' if status == 418 else 'rate_limited'] += 1
+            base = 60.0 if status == 418 else 1.0
+            delay = retry_after or min(self.max_backoff, base * 2 ** (self._level - 1))
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + delay)
+            self._refill(now)
+            self._tokens = 0.0
+            self._cond.notify_all()
+        return delay
+
+    def _succeeded(self, headers):
+        used = headers.get('x-mbx-used-weight-1m') or headers.get('X-MBX-USED-WEIGHT-1M')
+        if not self._level and used is None:
+            return
+        with self._cond:
+            self._level = 0
+            if used is not None:
+                self._refill(time.monotonic())
+                self._tokens = min(self._tokens, self.capacity - float(used))
+
+    def call(self, endpoint, fn, *args, priority=MARKET_DATA, retries=5, retry_errors=False, **kwargs):
+        """
+        Runs fn(*args, **kwargs) within the budget. Rate-limit rejections are
+        retried after the adaptive pause (safe for orders too: the request was
+        refused). Other errors are retried with exponential backoff only when
+        `retry_errors` is set, i.e. for idempotent reads.
+        """
+        for attempt in range(retries + 1):
+            self.acquire(endpoint, priority)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                last = attempt == retries
+                status = rate_limit_status(e)
+                if status is not None:
+                    retry_after = _response_headers(fn).get('Retry-After')
+                    delay = self.penalize(status, float(retry_after) if retry_after else None)
+                    log.warning("%s: HTTP %s, pausing requests for %.1fs", endpoint, status, delay)
+                    if last:
+                        raise
+                    continue
+                if not retry_errors or last:
+                    raise
+                delay = min(self.max_backoff, 2 ** attempt)
+                log.warning("%s failed (%s), retrying in %ss", endpoint, e, delay)
+                time.sleep(delay)
+                continue
+            self._succeeded(_response_headers(fn))
+            return result
+
+def scheduler_for(venue):
+    """
+    The process-wide scheduler for `venue` (e.g. 'binance', 'delta'), created
+    from VENUE_LIMITS on first use.
+    """
+    with _registry_lock:
+        scheduler = _schedulers.get(venue)
+        if scheduler is None:
+            limits = VENUE_LIMITS.get(venue, DEFAULT_LIMITS)
+            scheduler = _schedulers[venue] = RequestScheduler(limits['capacity'], limits['window'], limits['weights'])
+        return scheduler
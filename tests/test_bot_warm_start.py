@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from src.live_trade.bot import TradingBot
+from src.live_trade.journal import StateJournal
+from src.live_trade.metrics import Metrics
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class NoCandlesExchange:
+    # The range backfill always fails; orders go through
+    def __init__(self):
+        self.orders = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=None):
+        raise ConnectionError('venue down')
+
+    def create_order(self, symbol, type, side, amount):
+        self.orders.append(side)
+        return {'id': str(len(self.orders)), 'average': None}
+
+
+def restored_bot(tmp_path, **config):
+    clock = Clock(datetime(2024, 1, 2, 5, 0, tzinfo=timezone.utc))
+    journal = StateJournal(str(tmp_path / 'state.jsonl'))
+    journal.append({'ts': 0, 'date': '2024-01-02', 'daily_trade_taken': True, 'active_position': {
+        'side': 'buy', 'entry': 100.0, 'sl': 99.7, 'tp': 100.7, 'trailing_active': False}})
+    exchange = NoCandlesExchange()
+    bot = TradingBot(exchange, {'symbol': 'X', 'quantity': 1, **config}, metrics=Metrics(), clock=clock,
+                     journal=journal)
+    bot.warm_start()
+    return bot, exchange, clock
+
+
+def feed(bot, clock, hour, minute, second, price):
+    clock.now = datetime(2024, 1, 2, hour, minute, second, tzinfo=timezone.utc)
+    bot.on_price(price, clock.now)
+
+
+def test_restored_position_without_range_hits_its_stop(tmp_path):
+    bot, exchange, clock = restored_bot(tmp_path)
+    assert bot.session_high is None and bot.active_position is not None
+
+    feed(bot, clock, 5, 1, 0, 99.0)
+    assert exchange.orders == ['sell']
+    assert bot.active_position is None
+    assert bot.strategy.exit_ts is not None
+
+
+def test_restored_position_without_range_exits_on_time(tmp_path):
+    bot, exchange, clock = restored_bot(tmp_path)
+    feed(bot, clock, 13, 0, 0, 100.1)
+    feed(bot, clock, 13, 44, 0, 100.2)
+    assert exchange.orders == []
+
+    feed(bot, clock, 13, 45, 1, 100.2)
+    assert exchange.orders == ['sell']
+    assert bot.active_position is None
+
+
+def test_restored_position_without_range_tick_mode(tmp_path):
+    bot, exchange, clock = restored_bot(tmp_path, bar_minutes=0)
+    feed(bot, clock, 6, 0, 0, 100.3)
+    assert exchange.orders == []
+
+    feed(bot, clock, 14, 0, 0, 100.3)
+    assert exchange.orders == ['sell']
+    assert bot.active_position is None
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timezone
+
+from src.live_trade.bot import TradingBot
+from src.live_trade.feeds import IterableFeed, SocketFeed, serve_ticks
+from src.live_trade.metrics import Metrics
+
+
+def collect(feed, limit=None):
+    async def main():
+        ticks = []
+        async for tick in feed:
+            ticks.append(tick)
+            if len(ticks) == limit:
+                break
+        return ticks
+    return main()
+
+
+def test_socket_feed_replays_served_ticks():
+    ticks = [(1_700_000_000_000 + i * 1000, 100.0 + i / 8) for i in range(500)]
+
+    async def main():
+        server = await serve_ticks(ticks)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            # Every client gets the whole stream
+            return await asyncio.gather(collect(SocketFeed(port=port)), collect(SocketFeed(port=port)))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    first, second = asyncio.run(main())
+    assert first == ticks and second == ticks
+
+
+def test_client_leaving_early_does_not_stop_the_server():
+    ticks = [(i, float(i)) for i in range(100)]
+
+    async def main():
+        server = await serve_ticks(ticks, interval=0.001)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            early = await collect(SocketFeed(port=port), limit=5)
+            full = await collect(SocketFeed(port=port))
+        finally:
+            server.close()
+            await server.wait_closed()
+        return early, full
+
+    early, full = asyncio.run(main())
+    assert early == ticks[:5] and full == ticks
+
+
+class RecordingExchange:
+    def __init__(self):
+        self.quotes = []
+
+    def on_quote(self, symbol, bid, ask=None, timestamp=None):
+        self.quotes.append((timestamp, bid))
+
+
+def test_bot_consumes_a_feed():
+    start = int(datetime(2024, 1, 2, 5, tzinfo=timezone.utc).timestamp() * 1000)
+    ticks = [(start + i * 1000, 100.0) for i in range(10)]
+    exchange = RecordingExchange()
+    metrics = Metrics()
+    bot = TradingBot(exchange, {'symbol': 'X', 'quantity': 1, 'range_backfill': False}, metrics=metrics,
+                     clock=lambda: datetime.fromtimestamp(start / 1000, timezone.utc))
+    asyncio.run(bot.run_async(IterableFeed(ticks)))
+    assert exchange.quotes == ticks
+    assert metrics.counters['ticks'] == 10
@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.live_trade.bot import TradingBot
+from src.live_trade.execution import PaperTradingAdapter
+from src.live_trade.metrics import Metrics
+from src.live_trade.routing import DelayedAdapter, OrderUnresolved, RoutingAdapter
+
+
+def venues(stall):
+    # Venue 'a' ranks first and stalls for `stall` seconds on every call
+    a, b = PaperTradingAdapter(None), PaperTradingAdapter(None)
+    router = RoutingAdapter({'a': DelayedAdapter(a, stall=stall), 'b': b}, timeout=0.1, settle_timeout=0.1,
+                            probe_interval=1e9)
+    router.on_quote('X', 100.0)
+    return router, a, b
+
+
+def test_create_order_raises_while_unresolved():
+    router, a, b = venues(stall=0.5)
+    with pytest.raises(OrderUnresolved):
+        router.create_order('X', 'market', 'buy', 1)
+    assert len(b.journal) == 0
+
+
+def test_bot_waits_out_a_stalled_venue(tmp_path):
+    router, a, b = venues(stall=0.6)
+    now = datetime(2024, 1, 2, 5, 0, tzinfo=timezone.utc)
+    bot = TradingBot(router, {'symbol': 'X', 'quantity': 1, 'bar_minutes': 0, 'range_backfill': False},
+                     metrics=Metrics(), clock=lambda: now)
+
+    bot.execute_entry('buy', 100.0)
+    position = bot.active_position
+    assert position['pending'] and position['unresolved']
+
+    deadline = time.monotonic() + 5
+    while position.get('pending') and time.monotonic() < deadline:
+        bot.on_price(100.0, now)
+        time.sleep(0.05)
+
+    assert bot.active_position is position and not position.get('pending')
+    # Settled on the stalled venue, never resent elsewhere
+    assert len(a.journal) == 1
+    assert len(b.journal) == 0
+
+
+def test_refused_order_fails_over():
+    a, b = PaperTradingAdapter(None), PaperTradingAdapter(None)
+    router = RoutingAdapter({'a': DelayedAdapter(a, fail=True), 'b': b}, timeout=0.1, probe_interval=1e9)
+    router.on_quote('X', 100.0)
+    order = router.submit_order('X', 'market', 'buy', 1, client_order_id='cid-1')
+    assert order['venue'] == 'b'
+    assert len(a.journal) == 0 and len(b.journal) == 1
+    assert router.fetch_order_by_client_id('X', 'cid-1')['id'] == order['id']